@@ -0,0 +1,94 @@
+"""
+Motor de asignación de usuarios a N grupos (keywords)
+Reparte un pool de candidatos en una sola pasada respetando bloqueos por grupo
+"""
+
+import random
+from typing import Dict, Iterable, List, Set
+
+
+def calcular_cupos(total: int, grupos: int) -> List[int]:
+    """
+    Reparte `total` plazas entre `grupos` lo más equitativamente posible
+
+    Args:
+        total: Número total de usuarios a asignar
+        grupos: Número de grupos
+
+    Returns:
+        Cupo de cada grupo (los primeros reciben el resto de la división)
+    """
+    if grupos <= 0:
+        raise ValueError("Se requiere al menos un grupo")
+    base, resto = divmod(total, grupos)
+    return [base + (1 if i < resto else 0) for i in range(grupos)]
+
+
+def asignar_grupos(
+    candidatos: Iterable[str],
+    nombres: List[str],
+    total: int,
+    bloqueados: Dict[str, Set[str]] = None,
+    rng: random.Random = None
+) -> Dict[str, List[str]]:
+    """
+    Asigna usuarios a grupos sin repetirlos, evitando los bloqueados de cada grupo
+
+    Recorre el pool (en orden aleatorio) una sola vez: cada candidato va al
+    siguiente grupo con cupo libre donde no esté bloqueado. Los candidatos que
+    no encajan en ningún grupo quedan como reserva y, si al terminar faltan
+    usuarios para llegar a `total`, se reparten al azar ignorando bloqueos.
+
+    Args:
+        candidatos: Pool de usuarios únicos
+        nombres: Nombres de los grupos, en orden
+        total: Número total de usuarios a asignar
+        bloqueados: Usuarios no disponibles por grupo
+        rng: Generador aleatorio (para reproducibilidad)
+
+    Returns:
+        Diccionario nombre -> usuarios asignados, en el orden de `nombres`
+    """
+    rng = rng or random
+    bloqueados = bloqueados or {}
+    cupos = calcular_cupos(total, len(nombres))
+
+    pool = list(candidatos)
+    rng.shuffle(pool)
+
+    grupos: Dict[str, List[str]] = {nombre: [] for nombre in nombres}
+    vacios = [bloqueados.get(nombre, set()) for nombre in nombres]
+    pendientes = [i for i, cupo in enumerate(cupos) if cupo > 0]
+    reserva: List[str] = []
+    cursor = 0
+
+    for usuario in pool:
+        if not pendientes:
+            break
+
+        # Round-robin sobre los grupos con cupo libre
+        for paso in range(len(pendientes)):
+            pos = (cursor + paso) % len(pendientes)
+            i = pendientes[pos]
+            if usuario in vacios[i]:
+                continue
+
+            grupo = grupos[nombres[i]]
+            grupo.append(usuario)
+            if len(grupo) >= cupos[i]:
+                pendientes.pop(pos)
+                cursor = pos
+            else:
+                cursor = pos + 1
+            break
+        else:
+            reserva.append(usuario)
+
+    # Completar con la reserva si los bloqueos impidieron llenar los cupos
+    asignados = sum(len(g) for g in grupos.values())
+    faltantes = total - asignados
+    if faltantes > 0 and reserva:
+        for usuario in rng.sample(reserva, min(faltantes, len(reserva))):
+            grupos[rng.choice(nombres)].append(usuario)
+
+    return grupos
@@ -7,9 +7,14 @@ import shutil
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from logger import bot_logger
 from config import Config
+from persistencia import fsync_archivo, fsync_directorio
+from utils import politica_io
+
+# Archivo con las firmas (tamaño, mtime) de cada generación de snapshot
+MANIFEST_NAME = 'manifest.json'
 
 
 class BackupManager:
@@ -17,6 +22,7 @@ class BackupManager:
     
     def __init__(self, backup_dir: str = None):
         self.backup_dir = backup_dir or Config.BACKUP_DIR
+        self.snapshots_dir = os.path.join(self.backup_dir, 'snapshots')
         self.enabled = Config.BACKUP_ENABLED
         
         if self.enabled:
@@ -47,7 +53,7 @@ class BackupManager:
             backup_path = os.path.join(self.backup_dir, backup_name)
             
             # Copiar archivo
-            shutil.copy2(file_path, backup_path)
+            politica_io('backup').call(shutil.copy2, file_path, backup_path)
             
             bot_logger.debug(f"Backup creado: {backup_name}")
             
@@ -126,7 +132,7 @@ class BackupManager:
                 return False
             
             # Restaurar
-            shutil.copy2(backup_path, file_path)
+            politica_io('restauracion').call(shutil.copy2, backup_path, file_path)
             bot_logger.info(f"Archivo restaurado desde: {Path(backup_path).name}")
             
             return True
@@ -158,3 +164,214 @@ class BackupManager:
         except Exception as e:
             bot_logger.error(f"Error listando backups: {e}")
             return []
+    
+    # ==================== SNAPSHOTS DE DATA_DIR ====================
+    
+    @staticmethod
+    def _archivos_datos(data_dir: str) -> Dict[str, Tuple[int, int]]:
+        """Archivos de datos de primer nivel con su firma (tamaño, mtime_ns)"""
+        firmas = {}
+        for entry in os.scandir(data_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                st = entry.stat()
+                firmas[entry.name] = (st.st_size, st.st_mtime_ns)
+        return firmas
+    
+    def _leer_manifest(self, generacion: str) -> Dict:
+        """Lee el manifest de una generación ({} si no existe)"""
+        try:
+            with open(os.path.join(self.snapshots_dir, generacion, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def list_snapshots(self) -> List[str]:
+        """
+        Lista las generaciones de snapshot disponibles
+        
+        Returns:
+            Nombres de generación, de la más reciente a la más antigua
+        """
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(
+            (d for d in os.listdir(self.snapshots_dir)
+             if d.startswith('gen_') and os.path.isdir(os.path.join(self.snapshots_dir, d))),
+            reverse=True
+        )
+    
+    def create_snapshot(self, data_dir: str = None, max_attempts: int = 3, limpiar: bool = True) -> Optional[str]:
+        """
+        Captura DATA_DIR como una generación consistente
+        
+        Los archivos sin cambios respecto a la generación anterior (mismo
+        tamaño y mtime) se enlazan con hardlink en lugar de copiarse, así que
+        el coste es proporcional a los archivos modificados. Si algún archivo
+        cambia mientras se captura, la generación se descarta y se reintenta.
+        
+        Args:
+            data_dir: Directorio a capturar (Config.DATA_DIR por defecto)
+            max_attempts: Intentos si los datos cambian durante la captura
+            limpiar: Aplicar MAX_SNAPSHOTS tras crear la generación
+            
+        Returns:
+            Nombre de la generación creada o None si falló
+        """
+        data_dir = data_dir or Config.DATA_DIR
+        temp_dir = None
+        
+        try:
+            os.makedirs(self.snapshots_dir, exist_ok=True)
+            
+            previas = self.list_snapshots()
+            previa = previas[0] if previas else None
+            firmas_previas = self._leer_manifest(previa).get('archivos', {}) if previa else {}
+            
+            for attempt in range(1, max_attempts + 1):
+                generacion = f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+                temp_dir = os.path.join(self.snapshots_dir, f".tmp_{generacion}")
+                os.makedirs(temp_dir)
+                
+                firmas = self._archivos_datos(data_dir)
+                copiados = enlazados = 0
+                
+                for nombre, firma in firmas.items():
+                    destino = os.path.join(temp_dir, nombre)
+                    anterior = os.path.join(self.snapshots_dir, previa, nombre) if previa else None
+                    
+                    if anterior and tuple(firmas_previas.get(nombre, ())) == firma and os.path.exists(anterior):
+                        try:
+                            os.link(anterior, destino)
+                            enlazados += 1
+                            continue
+                        except OSError:
+                            pass  # Sistema de archivos sin hardlinks: copiar
+                    
+                    politica_io('snapshot').call(shutil.copy2, os.path.join(data_dir, nombre), destino)
+                    copiados += 1
+                
+                # Consistencia: nada debe haber cambiado durante la captura
+                if self._archivos_datos(data_dir) != firmas:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    bot_logger.warning(f"Datos modificados durante el snapshot (intento {attempt}/{max_attempts})")
+                    continue
+                
+                manifest = {
+                    'creado': datetime.now().isoformat(),
+                    'data_dir': os.path.abspath(data_dir),
+                    'archivos': firmas
+                }
+                with open(os.path.join(temp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, indent=2)
+                
+                os.replace(temp_dir, os.path.join(self.snapshots_dir, generacion))
+                temp_dir = None
+                if Config.DURABILIDAD != 'none':
+                    fsync_directorio(self.snapshots_dir)
+                
+                bot_logger.info(f"Snapshot creado: {generacion} ({copiados} copiados, {enlazados} enlazados)")
+                if limpiar:
+                    self._cleanup_old_snapshots()
+                return generacion
+            
+            bot_logger.error("No se pudo crear un snapshot consistente (los datos cambiaban continuamente)")
+            return None
+            
+        except Exception as e:
+            # No dejar atrás la copia parcial (con hardlinks) de DATA_DIR
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            bot_logger.error(f"Error creando snapshot: {e}")
+            return None
+    
+    def _cleanup_old_snapshots(self, conservar: Tuple[str, ...] = ()):
+        """
+        Elimina las generaciones más antiguas manteniendo solo las últimas N
+        
+        Args:
+            conservar: Generaciones que no se eliminan aunque excedan el límite
+        """
+        try:
+            antiguas = self.list_snapshots()[Config.MAX_SNAPSHOTS:]
+            for generacion in (g for g in antiguas if g not in conservar):
+                shutil.rmtree(os.path.join(self.snapshots_dir, generacion), ignore_errors=True)
+                bot_logger.debug(f"Snapshot antiguo eliminado: {generacion}")
+        except Exception as e:
+            bot_logger.error(f"Error limpiando snapshots antiguos: {e}")
+    
+    def restore_snapshot(self, generacion: str = None, data_dir: str = None) -> bool:
+        """
+        Restaura DATA_DIR completo a una generación
+        
+        Antes de restaurar se captura el estado actual como una nueva
+        generación. Los archivos se copian (nunca se enlazan) para que
+        escrituras posteriores no alteren el snapshot, y solo se publican
+        con os.replace cuando todos los temporales están preparados. La
+        limpieza posterior nunca elimina la generación restaurada.
+        
+        Args:
+            generacion: Generación a restaurar (o None para la más reciente)
+            data_dir: Directorio de datos (Config.DATA_DIR por defecto)
+            
+        Returns:
+            True si se restauró correctamente
+        """
+        data_dir = data_dir or Config.DATA_DIR
+        
+        try:
+            generaciones = self.list_snapshots()
+            generacion = generacion or (generaciones[0] if generaciones else None)
+            
+            if not generacion or generacion not in generaciones:
+                bot_logger.error(f"Snapshot no encontrado: {generacion}")
+                return False
+            
+            archivos = self._leer_manifest(generacion).get('archivos')
+            if archivos is None:
+                bot_logger.error(f"Snapshot sin manifest (incompleto): {generacion}")
+                return False
+            
+            # Guardar el estado actual antes de sobrescribirlo
+            os.makedirs(data_dir, exist_ok=True)
+            previo = self.create_snapshot(data_dir, limpiar=False)
+            if previo is None:
+                bot_logger.error("No se pudo respaldar el estado actual; restauración cancelada")
+                return False
+            
+            origen_dir = os.path.join(self.snapshots_dir, generacion)
+            sincronizar = Config.DURABILIDAD != 'none'
+            
+            # Primero se preparan todos los temporales: si falla alguno, DATA_DIR no cambia
+            temporales = {}
+            try:
+                for nombre in archivos:
+                    temp_path = os.path.join(data_dir, nombre + '.tmp')
+                    temporales[nombre] = temp_path
+                    politica_io('restauracion').call(shutil.copy2, os.path.join(origen_dir, nombre), temp_path)
+                    if sincronizar:
+                        politica_io('fsync').call(fsync_archivo, temp_path)
+            except BaseException:
+                for temp_path in temporales.values():
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                raise
+            
+            for nombre, temp_path in temporales.items():
+                politica_io('reemplazo').call(os.replace, temp_path, os.path.join(data_dir, nombre))
+            
+            # Archivos creados después de la generación no forman parte de ella
+            for nombre in set(self._archivos_datos(data_dir)) - set(archivos):
+                os.remove(os.path.join(data_dir, nombre))
+            
+            if sincronizar:
+                fsync_directorio(data_dir)
+            
+            bot_logger.info(f"Datos restaurados desde {generacion} (estado previo guardado en {previo})")
+            self._cleanup_old_snapshots(conservar=(generacion, previo))
+            return True
+            
+        except Exception as e:
+            bot_logger.error(f"Error restaurando snapshot: {e}")
+            return False
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de la capa de datos
+Ejecuta: python benchmark.py [--solo NOMBRE] [--usuarios N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from logger import bot_logger
+
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+# Carpeta base para los directorios temporales (None = temporal del sistema)
+DIRECTORIO_BASE = None
+
+
+def benchmark(nombre: str):
+    """Registra una función de benchmark bajo un nombre"""
+    def decorator(func: Callable) -> Callable:
+        BENCHMARKS[nombre] = func
+        return func
+    return decorator
+
+
+@contextmanager
+def directorio_temporal():
+    """Directorio temporal que se elimina al terminar"""
+    path = tempfile.mkdtemp(prefix='bot_bench_', dir=DIRECTORIO_BASE)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def cronometrar(func: Callable, repeticiones: int = 1) -> float:
+    """Retorna el mejor tiempo (segundos) de `repeticiones` ejecuciones"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def usuarios_sinteticos(cantidad: int, seed: int = 42) -> list:
+    """Genera nombres de usuario sintéticos únicos"""
+    rng = random.Random(seed)
+    return [f"user_{i}_{rng.randrange(10**6)}" for i in range(cantidad)]
+
+
+@benchmark('asignacion')
+def bench_asignacion(usuarios: int):
+    """Motor de asignación a N grupos y modificar_login_json completo"""
+    from asignacion import asignar_grupos
+    from manager import UsuariosManager
+
+    pool = usuarios_sinteticos(usuarios)
+    rng = random.Random(1)
+
+    for grupos, total in ((4, 40), (10, 1000), (50, usuarios // 2)):
+        nombres = [f"grupo{i}" for i in range(grupos)]
+        # ~10% del pool bloqueado en cada grupo
+        bloqueados = {n: set(rng.sample(pool, usuarios // 10)) for n in nombres}
+        segundos = cronometrar(lambda: asignar_grupos(pool, nombres, total, bloqueados, rng), 3)
+        print(f"  asignar_grupos {grupos} grupos, {total} usuarios, pool {usuarios}: {segundos * 1000:.1f} ms")
+
+    with directorio_temporal() as tmp:
+        manager = UsuariosManager(data_dir=tmp, backup_dir=os.path.join(tmp, 'backups'))
+        destino = os.path.join(tmp, 'login.json')
+        segundos = cronometrar(lambda: manager.modificar_login_json(pool, destino=destino), 3)
+        print(f"  modificar_login_json 4x10, pool {usuarios}: {segundos * 1000:.1f} ms")
+
+
+@benchmark('durabilidad')
+def bench_durabilidad(usuarios: int):
+    """Coste por operación de cada nivel de durabilidad (none / fsync / group-commit)"""
+    from manager import UsuariosManager
+    from persistencia import DURABILIDADES
+
+    principales = usuarios_sinteticos(min(usuarios, 10_000))
+    lote = principales[:5] + usuarios_sinteticos(5, seed=7)
+    operaciones = 20
+
+    for durabilidad in DURABILIDADES:
+        with directorio_temporal() as tmp:
+            manager = UsuariosManager(
+                data_dir=tmp,
+                backup_dir=os.path.join(tmp, 'backups'),
+                durabilidad=durabilidad
+            )
+            manager.backup_manager.enabled = False  # Medir solo la persistencia
+            manager._guardar_json(manager.principales_path, principales)
+
+            def operacion():
+                # agregar_nuevos_usuarios escribe principales + repetidos en una operación
+                for _ in range(operaciones):
+                    manager.agregar_nuevos_usuarios(lote)
+
+            segundos = cronometrar(operacion)
+            print(f"  {durabilidad:<13} agregar_nuevos_usuarios ({len(principales)} principales): "
+                  f"{segundos / operaciones * 1000:.2f} ms/op")
+
+            # Tres archivos pequeños en una operación: aísla el coste de las barreras
+            paths = [os.path.join(tmp, f"mini_{i}.json") for i in range(3)]
+
+            def escrituras_pequenas():
+                for _ in range(operaciones):
+                    with manager._transaccion():
+                        for path in paths:
+                            manager._guardar_json(path, lote, backup=False)
+
+            segundos = cronometrar(escrituras_pequenas)
+            print(f"  {durabilidad:<13} 3 archivos pequeños por operación: "
+                  f"{segundos / operaciones * 1000:.2f} ms/op")
+
+
+@benchmark('importacion')
+def bench_importacion(usuarios: int):
+    """Importación en streaming a principales: tiempo y pico de memoria"""
+    import tracemalloc
+    from manager import UsuariosManager
+
+    with directorio_temporal() as tmp:
+        fuente = os.path.join(tmp, 'usuarios.txt')
+        with open(fuente, 'w', encoding='utf-8') as f:
+            for usuario in usuarios_sinteticos(usuarios):
+                f.write(f"@{usuario[:15]}\n")
+
+        manager = UsuariosManager(data_dir=tmp, backup_dir=os.path.join(tmp, 'backups'))
+        for etapa in ('vacío', 'todo duplicado'):
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            conteo = manager.importar_usuarios([fuente])
+            segundos = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  importar {usuarios} usuarios ({etapa}): {segundos:.2f} s con tracemalloc, "
+                  f"pico {pico / 1024 / 1024:.1f} MB, {conteo['agregados']} agregados, "
+                  f"{conteo['duplicados']} duplicados")
+
+
+@benchmark('historial_memoria')
+def bench_historial_memoria(usuarios: int):
+    """
+    Historial como lista de dicts vs HistorialCompacto (10 registros por usuario del pool)
+
+    Mide la memoria retenida y la latencia del ciclo cargar → anexar →
+    guardar de cada modelo: el compacto ocupa menos pero se carga y se
+    guarda en Python puro, registro a registro.
+    """
+    import json
+    import tracemalloc
+    from datetime import datetime, timedelta
+    from esquema import CLAVE_ESQUEMA, envolver
+    from exportar import iterar_json
+    from historial_compacto import HistorialCompacto
+    from persistencia import EscritorLista
+
+    registros = usuarios * 10
+    distintos = min(usuarios, 50_000)
+    inicio = datetime(2026, 1, 1, 12, 0, 0, 123456)
+
+    def registro(i: int) -> dict:
+        fecha = (inicio + timedelta(seconds=i * 7)).isoformat()
+        if i % 2:
+            return {'usuario': f"user_{i % distintos}", 'fecha': fecha}
+        return {'usuario': f"user_{i % distintos}", 'keyword': f"grupo{i % 4}", 'fecha': fecha, 'tipo': 'login_json'}
+
+    def leidos():
+        # Registros tal como los produce json.load (strings nuevos en cada registro)
+        for desde in range(0, registros, 10_000):
+            yield from json.loads(json.dumps([registro(i) for i in range(desde, min(desde + 10_000, registros))]))
+
+    def medir(construir):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        resultado = construir()
+        segundos = time.perf_counter() - t0
+        retenida, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return resultado, segundos, retenida, pico
+
+    lista, segundos, retenida, pico = medir(lambda: list(leidos()))
+    print(f"  lista de dicts, {registros:,} registros: {retenida / 1024 / 1024:.1f} MB retenidos, "
+          f"pico {pico / 1024 / 1024:.1f} MB ({segundos:.1f} s con tracemalloc)")
+    del lista
+
+    compacto, segundos, retenida_compacto, pico = medir(lambda: HistorialCompacto.desde_registros(leidos()))
+    print(f"  HistorialCompacto, {registros:,} registros: {retenida_compacto / 1024 / 1024:.1f} MB retenidos, "
+          f"pico {pico / 1024 / 1024:.1f} MB ({segundos:.1f} s con tracemalloc)")
+    print(f"  reducción: {retenida / max(retenida_compacto, 1):.1f}x")
+
+    segundos = cronometrar(lambda: sum(1 for _ in compacto.iterar_json()))
+    print(f"  conversión a la forma JSON (todos los registros): {segundos:.2f} s")
+    del compacto
+
+    nuevos = [registro(registros + i) for i in range(10)]
+    with directorio_temporal() as tmp:
+        path = os.path.join(tmp, 'historial_entregados.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(envolver('historial', list(leidos())), f, indent=2, ensure_ascii=False)
+
+        def ciclo_lista():
+            t0 = time.perf_counter()
+            with open(path, 'r', encoding='utf-8') as f:
+                documento = json.load(f)
+            t1 = time.perf_counter()
+            documento['datos'].extend(nuevos)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(documento, f, indent=2, ensure_ascii=False)
+            return t1 - t0, time.perf_counter() - t1
+
+        def ciclo_compacto():
+            t0 = time.perf_counter()
+            historial = HistorialCompacto.desde_registros(iterar_json(path))
+            t1 = time.perf_counter()
+            historial.extend(nuevos)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                escritor = EscritorLista(f, envolver('historial', [])[CLAVE_ESQUEMA])
+                for valor in historial.iterar_json():
+                    escritor.escribir(valor)
+                escritor.cerrar()
+            os.replace(temp_path, path)
+            return t1 - t0, time.perf_counter() - t1
+
+        print(f"  latencia de cargar → anexar 10 → guardar ({os.path.getsize(path) / 1024 / 1024:.0f} MB en disco):")
+        for nombre, ciclo in (('lista (json.load/dump)', ciclo_lista), ('HistorialCompacto', ciclo_compacto)):
+            carga, guardado = ciclo()
+            print(f"    {nombre:<22} carga {carga:.2f} s + guardado {guardado:.2f} s = {carga + guardado:.2f} s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de la capa de datos")
+    parser.add_argument('--solo', choices=sorted(BENCHMARKS), help="Ejecutar un único benchmark")
+    parser.add_argument('--usuarios', type=int, default=100_000, help="Tamaño del pool sintético")
+    parser.add_argument('--dir', default=None,
+                        help="Carpeta donde crear los datos temporales (p. ej. el disco de DATA_DIR)")
+    args = parser.parse_args()
+
+    global DIRECTORIO_BASE
+    DIRECTORIO_BASE = args.dir
+
+    # Evitar que el logging distorsione las mediciones
+    bot_logger.setLevel(logging.WARNING)
+
+    nombres = [args.solo] if args.solo else list(BENCHMARKS)
+    for nombre in nombres:
+        print(f"\n▶ {nombre}: {BENCHMARKS[nombre].__doc__}")
+        BENCHMARKS[nombre](args.usuarios)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
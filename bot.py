@@ -4,9 +4,16 @@ Bot de gestión de usuarios de Twitter con CLI mejorado
 """
 
 from manager import UsuariosManager
+from backup import BackupManager
 from scraper import TwitterScraper
 from logger import bot_logger, log_exception
 from config import Config
+from perfilado import MODOS_PERFIL, perfilar
+from retencion import DATASETS_RETENCION, MotorRetencion, retencion_al_inicio
+from exportar import parsear_fecha
+from utils import retry_metrics
+import argparse
+import json
 import sys
 
 
@@ -172,8 +179,22 @@ def ver_estadisticas():
         print("="*50)
         print(f"Total usuarios en base principal: {stats['total_principales']}")
         print(f"Total en historial (últimos 30 días): {stats['total_historial']}")
-        print(f"Total usuarios repetidos detectados: {stats['total_repetidos']}")
+        print(f"Total usuarios repetidos detectados: {stats['usuarios_repetidos']} "
+              f"({stats['total_repetidos']} avistamientos)")
         print(f"Total en base inicial: {stats['total_base']}")
+        
+        top = manager.top_repetidos(5)
+        if top:
+            print("\nUsuarios más repetidos:")
+            for item in top:
+                print(f"  @{item['usuario']}: {item['count']} veces (último: {item['last_seen'][:16]})")
+        
+        metricas = retry_metrics.snapshot()
+        if metricas:
+            print("\nMétricas de E/S (esta sesión):")
+            for operacion, datos in sorted(metricas.items()):
+                print(f"  {operacion}: {datos['llamadas']} llamadas, {datos['reintentos']} reintentos, "
+                      f"{datos['fallos']} fallos, máx {datos['segundos_max'] * 1000:.1f} ms")
         print("="*50 + "\n")
         
     except Exception as e:
@@ -194,9 +215,26 @@ def limpiar_historial():
         print(f"\n✗ Error: {e}")
 
 
-def main():
+# Acciones del menú principal (la opción 6 sale del bot)
+ACCIONES_MENU = {
+    '1': modificar_json_login,
+    '2': iniciar_scraping_automatico,
+    '3': scraping_manual,
+    '4': ver_estadisticas,
+    '5': limpiar_historial,
+}
+
+
+def main(perfil: str = None):
     """Función principal"""
+    Config.validate()
     bot_logger.info("Bot iniciado")
+    bot_logger.debug(f"Configuración efectiva: {Config.snapshot()}")
+    
+    try:
+        retencion_al_inicio()
+    except Exception as e:
+        log_exception(bot_logger, e, "Error aplicando la retención al inicio")
     
     while True:
         mostrar_menu()
@@ -204,19 +242,14 @@ def main():
         try:
             opcion = input("Selecciona una opción: ").strip()
             
-            if opcion == '1':
-                modificar_json_login()
-            elif opcion == '2':
-                iniciar_scraping_automatico()
-            elif opcion == '3':
-                scraping_manual()
-            elif opcion == '4':
-                ver_estadisticas()
-            elif opcion == '5':
-                limpiar_historial()
+            if opcion in ACCIONES_MENU:
+                accion = ACCIONES_MENU[opcion]
+                with perfilar(accion.__name__, perfil):
+                    accion()
             elif opcion == '6':
                 print("\n¡Hasta luego! 👋\n")
                 bot_logger.info("Bot finalizado por el usuario")
+                bot_logger.debug(f"Métricas de reintentos de E/S: {retry_metrics.snapshot()}")
                 sys.exit(0)
             else:
                 print("\n⚠ Opción inválida. Intenta de nuevo.")
@@ -230,6 +263,240 @@ def main():
             print(f"\n✗ Error inesperado: {e}\n")
 
 
+# ==================== SUBCOMANDOS (CLI) ====================
+
+def comando_exportar(args) -> int:
+    """Subcomando: exportar datos a CSV/Parquet"""
+    try:
+        manager = UsuariosManager()
+        generados = manager.exportar_datos(
+            destino_dir=args.destino,
+            formato=args.formato,
+            desde=args.desde,
+            datasets=args.datasets
+        )
+        
+        print("\n✓ Exportación completada:")
+        for dataset, path in generados.items():
+            print(f"  - {dataset}: {path}")
+        return 0
+        
+    except Exception as e:
+        log_exception(bot_logger, e, "Error exportando datos")
+        print(f"\n✗ Error exportando datos: {e}")
+        return 1
+
+
+def comando_snapshot(args) -> int:
+    """Subcomando: crear, listar o restaurar snapshots de DATA_DIR"""
+    backup_manager = BackupManager()
+    
+    if args.accion == 'listar':
+        generaciones = backup_manager.list_snapshots()
+        if not generaciones:
+            print("\n⚠ No hay snapshots disponibles")
+        for generacion in generaciones:
+            print(f"  - {generacion}")
+        return 0
+    
+    if args.accion == 'crear':
+        generacion = backup_manager.create_snapshot()
+        if generacion is None:
+            print("\n✗ No se pudo crear el snapshot (revisa los logs)")
+            return 1
+        print(f"\n✓ Snapshot creado: {generacion}")
+        return 0
+    
+    if backup_manager.restore_snapshot(args.generacion):
+        print(f"\n✓ Datos restaurados desde {args.generacion or 'el snapshot más reciente'}")
+        return 0
+    print("\n✗ No se pudo restaurar el snapshot (revisa los logs)")
+    return 1
+
+
+def comando_migrar(args) -> int:
+    """Subcomando: migrar/reparar los archivos de datos al esquema versionado"""
+    try:
+        manager = UsuariosManager()
+        informe = manager.migrar_datos(forzar=args.forzar)
+        
+        print("\n✓ Archivos de datos verificados:")
+        for nombre, datos in informe.items():
+            cuarentena = f", {datos['cuarentena']} en cuarentena" if datos['cuarentena'] else ""
+            print(f"  - {nombre}: {datos['estado']} ({datos['registros']} registros{cuarentena})")
+        return 0
+        
+    except Exception as e:
+        log_exception(bot_logger, e, "Error migrando datos")
+        print(f"\n✗ Error migrando datos: {e}")
+        return 1
+
+
+def comando_retencion(args) -> int:
+    """Subcomando: aplicar (o simular) las políticas de retención"""
+    try:
+        motor = MotorRetencion()
+        resultados = motor.ejecutar(args.datasets, dry_run=args.dry_run, forzar=True)
+        
+        titulo = "Simulación de retención (no se eliminó nada)" if args.dry_run else "Retención aplicada"
+        print(f"\n✓ {titulo}:")
+        for resultado in resultados:
+            if resultado.omitido:
+                print(f"  - {resultado.dataset}: sin política")
+                continue
+            print(f"  - {resultado.dataset}: {resultado.elementos}/{resultado.total} elementos, "
+                  f"{resultado.bytes_liberados / 1024:.1f} KB")
+        
+        total = sum(r.bytes_liberados for r in resultados)
+        verbo = "a recuperar" if args.dry_run else "recuperados"
+        print(f"  Total {verbo}: {total / 1024 / 1024:.2f} MB")
+        return 0
+        
+    except Exception as e:
+        log_exception(bot_logger, e, "Error aplicando retención")
+        print(f"\n✗ Error aplicando retención: {e}")
+        return 1
+
+
+def _leer_lista_usuarios(path: str) -> list:
+    """Usernames de un archivo de texto (uno por línea)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [linea.strip() for linea in f if linea.strip()]
+
+
+def comando_buscar(args) -> int:
+    """Subcomando: línea de tiempo de uno o varios usuarios"""
+    try:
+        usuarios = list(args.usuarios)
+        if args.archivo:
+            usuarios.extend(_leer_lista_usuarios(args.archivo))
+        if not usuarios:
+            print("\n⚠ Indica al menos un usuario o --archivo")
+            return 1
+        
+        resultados = UsuariosManager().buscar_usuarios(usuarios, eventos=not args.resumen)
+        
+        if args.json:
+            print(json.dumps(resultados, indent=2, ensure_ascii=False))
+            return 0
+        
+        for usuario, linea in resultados.items():
+            if linea is None:
+                print(f"\n@{usuario.lstrip('@')}: no aparece en principales, historial ni repetidos")
+                continue
+            
+            print(f"\n@{linea['usuario']} ({'principal' if linea['principal'] else 'no está en principales'})")
+            if linea['ultima_entrega']:
+                ultima = linea['ultima_entrega']
+                print(f"  Última entrega: {ultima['fecha'][:16]} (keyword: {ultima['keyword'] or '-'}), "
+                      f"{linea['total_entregas']} en total")
+            if linea['repetido']:
+                print(f"  Visto de nuevo {linea['repetido']['count']} veces")
+            for evento in linea['eventos']:
+                detalle = f" [{evento['keyword']}]" if evento.get('keyword') else ""
+                print(f"    {evento['fecha'][:16]}  {evento['evento']}{detalle}")
+        return 0
+        
+    except Exception as e:
+        log_exception(bot_logger, e, "Error buscando usuarios")
+        print(f"\n✗ Error buscando usuarios: {e}")
+        return 1
+
+
+def comando_importar(args) -> int:
+    """Subcomando: importar usuarios en masa a principales"""
+    try:
+        conteo = UsuariosManager().importar_usuarios(
+            args.archivos,
+            formato=args.formato,
+            columna=args.columna,
+            tam_bloque=args.bloque
+        )
+        
+        print("\n✓ Importación completada:")
+        print(f"  - Leídos: {conteo['leidos']}")
+        print(f"  - Agregados: {conteo['agregados']}")
+        print(f"  - Duplicados: {conteo['duplicados']}")
+        print(f"  - Inválidos: {conteo['invalidos']}")
+        print(f"  - Total en principales: {conteo['existentes'] + conteo['agregados']}")
+        return 0
+        
+    except Exception as e:
+        log_exception(bot_logger, e, "Error importando usuarios")
+        print(f"\n✗ Error importando usuarios: {e}")
+        return 1
+
+
+COMANDOS = {
+    'exportar': comando_exportar,
+    'snapshot': comando_snapshot,
+    'migrar': comando_migrar,
+    'retencion': comando_retencion,
+    'buscar': comando_buscar,
+    'importar': comando_importar,
+}
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    """Parser de la línea de comandos (sin subcomando se abre el menú)"""
+    parser = argparse.ArgumentParser(description="Bot de gestión de usuarios de Twitter")
+    parser.add_argument('--profile', choices=list(MODOS_PERFIL), default=None,
+                        help="Perfilar cada acción (CPU o memoria); también vía BOT_PROFILE")
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    exportar = subparsers.add_parser('exportar', help="Exportar historial, repetidos y principales")
+    exportar.add_argument('--formato', choices=['csv', 'parquet'], default='csv')
+    exportar.add_argument('--desde', '--since', type=parsear_fecha, default=None,
+                          help="Solo registros desde esta fecha (YYYY-MM-DD)")
+    exportar.add_argument('--destino', default=None, help="Carpeta de salida (EXPORT_DIR por defecto)")
+    exportar.add_argument('--datasets', nargs='+', choices=['historial', 'repetidos', 'principales'],
+                          default=None)
+    
+    snapshot = subparsers.add_parser('snapshot', help="Snapshots consistentes de DATA_DIR")
+    snapshot.add_argument('accion', choices=['crear', 'listar', 'restaurar'])
+    snapshot.add_argument('--generacion', default=None,
+                          help="Generación a restaurar (la más reciente por defecto)")
+    
+    migrar = subparsers.add_parser('migrar', help="Validar una vez los datos y pasar inválidos a cuarentena")
+    migrar.add_argument('--forzar', action='store_true',
+                        help="Revalidar también los archivos ya marcados como limpios")
+    
+    retencion = subparsers.add_parser('retencion', help="Aplicar las políticas de retención de datos")
+    retencion.add_argument('--dry-run', action='store_true',
+                           help="Solo informar de lo que se eliminaría y los bytes a recuperar")
+    retencion.add_argument('--datasets', nargs='+', choices=list(DATASETS_RETENCION), default=None)
+    
+    buscar = subparsers.add_parser('buscar', help="Línea de tiempo de uno o varios usuarios")
+    buscar.add_argument('usuarios', nargs='*', help="Usernames (con o sin @)")
+    buscar.add_argument('--archivo', default=None, help="Archivo con un username por línea")
+    buscar.add_argument('--json', action='store_true', help="Salida en JSON")
+    buscar.add_argument('--resumen', action='store_true',
+                        help="Solo el resumen por usuario (no lee el historial)")
+    
+    importar = subparsers.add_parser('importar', help="Importar usuarios en masa desde CSV/TXT/JSON")
+    importar.add_argument('archivos', nargs='+')
+    importar.add_argument('--formato', choices=['csv', 'txt', 'json'], default=None,
+                          help="Formato de entrada (por extensión si se omite)")
+    importar.add_argument('--columna', default=None,
+                          help="Columna CSV o clave JSON con el username (se detecta si se omite)")
+    importar.add_argument('--bloque', type=int, default=10_000, help="Usuarios por escritura")
+    
+    return parser
+
+
+def cli(argv=None) -> int:
+    """Punto de entrada: ejecuta un subcomando o el menú interactivo"""
+    args = construir_parser().parse_args(argv)
+    
+    if args.comando is None:
+        main(args.profile)
+        return 0
+    
+    Config.validate()
+    with perfilar(args.comando, args.profile):
+        return COMANDOS[args.comando](args)
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
 
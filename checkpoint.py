@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 from logger import bot_logger
 from config import Config
+from persistencia import guardar_json_atomico
 
 
 class CheckpointManager:
@@ -35,13 +36,8 @@ class CheckpointManager:
                 'state': state
             }
             
-            # Escritura atómica (temp + rename)
-            temp_file = self.checkpoint_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint_data, f, indent=2, ensure_ascii=False)
-            
-            # Renombrar (operación atómica en la mayoría de sistemas)
-            os.replace(temp_file, self.checkpoint_file)
+            # Escritura atómica (temp + rename) con la durabilidad configurada
+            guardar_json_atomico(self.checkpoint_file, checkpoint_data, Config.DURABILIDAD)
             
             bot_logger.debug(f"Checkpoint guardado: {checkpoint_data['timestamp']}")
             return True
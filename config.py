@@ -1,108 +1,288 @@
 """
 Módulo de configuración centralizada para el Twitter Bot
 Carga variables de entorno desde .env y proporciona valores por defecto
+
+La configuración se construye y valida la primera vez que se accede a un
+atributo de `Config` (importar el módulo no toca el sistema de archivos) y
+se recarga automáticamente si el archivo .env cambia durante la sesión.
 """
 
+import logging
 import os
+import random
+import threading
+import time
 from pathlib import Path
-from typing import List
-from dotenv import load_dotenv
-
-# Cargar variables de entorno desde .env
-load_dotenv()
+from typing import Any, Dict, List, Optional
+from dotenv import dotenv_values
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
 
 # Directorio raíz del proyecto
 PROJECT_ROOT = Path(__file__).parent.absolute()
 
-class Config:
-    """Configuración centralizada del bot"""
-    
+# Segundos mínimos entre comprobaciones del mtime de .env
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Nombre del logger del bot (ver logger.setup_logger)
+LOGGER_NAME = 'TwitterBot'
+
+
+class Settings(BaseModel):
+    """Modelo tipado de la configuración del bot"""
+
+    model_config = ConfigDict(frozen=True)
+
     # ==================== RUTAS ====================
-    CHROMEDRIVER_PATH: str = os.getenv(
-        'CHROMEDRIVER_PATH',
-        str(PROJECT_ROOT / 'chrome-win' / 'chromedriver.exe')
-    )
-    
-    CHROME_BINARY_PATH: str = os.getenv(
-        'CHROME_BINARY_PATH',
-        str(PROJECT_ROOT / 'chrome-win' / 'chrome.exe')
-    )
-    
-    CHROME_PROFILE_DIR: str = os.getenv(
-        'CHROME_PROFILE_DIR',
-        str(PROJECT_ROOT / 'chrome_profile')
-    )
-    
-    DATA_DIR: str = os.getenv(
-        'DATA_DIR',
-        str(PROJECT_ROOT / 'data')
-    )
-    
-    LOGIN_JSON_PATH: str = os.getenv(
-        'LOGIN_JSON_PATH',
-        r'I:\Archivos\login.json'
-    )
-    
+    CHROMEDRIVER_PATH: str = str(PROJECT_ROOT / 'chrome-win' / 'chromedriver.exe')
+    CHROME_BINARY_PATH: str = str(PROJECT_ROOT / 'chrome-win' / 'chrome.exe')
+    CHROME_PROFILE_DIR: str = str(PROJECT_ROOT / 'chrome_profile')
+    DATA_DIR: str = str(PROJECT_ROOT / 'data')
+    LOGIN_JSON_PATH: str = r'I:\Archivos\login.json'
+
     # ==================== SCRAPING ====================
-    HEADLESS_MODE: bool = os.getenv('HEADLESS_MODE', 'false').lower() == 'true'
-    SCROLL_COUNT: int = int(os.getenv('SCROLL_COUNT', '10'))
-    USUARIOS_POR_PASADA: int = int(os.getenv('USUARIOS_POR_PASADA', '10'))
-    LIKES_POR_PASADA: int = int(os.getenv('LIKES_POR_PASADA', '10'))
-    INTERVALO_MINUTOS: int = int(os.getenv('INTERVALO_MINUTOS', '10'))
-    DURACION_TOTAL_MINUTOS: int = int(os.getenv('DURACION_TOTAL_MINUTOS', '60'))
-    
+    HEADLESS_MODE: bool = False
+    SCROLL_COUNT: int = 10
+    USUARIOS_POR_PASADA: int = 10
+    LIKES_POR_PASADA: int = 10
+    INTERVALO_MINUTOS: int = 10
+    DURACION_TOTAL_MINUTOS: int = 60
+
     # ==================== ANTI-DETECCIÓN ====================
-    MIN_PAUSE_SECONDS: float = float(os.getenv('MIN_PAUSE_SECONDS', '2.0'))
-    MAX_PAUSE_SECONDS: float = float(os.getenv('MAX_PAUSE_SECONDS', '5.0'))
-    MIN_SCROLL_DISTANCE: int = int(os.getenv('MIN_SCROLL_DISTANCE', '600'))
-    MAX_SCROLL_DISTANCE: int = int(os.getenv('MAX_SCROLL_DISTANCE', '1000'))
-    MIN_POST_LIKE_WAIT: float = float(os.getenv('MIN_POST_LIKE_WAIT', '5.0'))
-    MAX_POST_LIKE_WAIT: float = float(os.getenv('MAX_POST_LIKE_WAIT', '8.0'))
-    MIN_SALTOS: int = int(os.getenv('MIN_SALTOS', '2'))
-    MAX_SALTOS: int = int(os.getenv('MAX_SALTOS', '6'))
-    
+    MIN_PAUSE_SECONDS: float = 2.0
+    MAX_PAUSE_SECONDS: float = 5.0
+    MIN_SCROLL_DISTANCE: int = 600
+    MAX_SCROLL_DISTANCE: int = 1000
+    MIN_POST_LIKE_WAIT: float = 5.0
+    MAX_POST_LIKE_WAIT: float = 8.0
+    MIN_SALTOS: int = 2
+    MAX_SALTOS: int = 6
+
     # ==================== LÍMITES DE SEGURIDAD ====================
-    MAX_LIKES_PER_HOUR: int = int(os.getenv('MAX_LIKES_PER_HOUR', '50'))
-    MAX_LIKES_PER_DAY: int = int(os.getenv('MAX_LIKES_PER_DAY', '200'))
-    DIAS_HISTORIAL_LIMPIEZA: int = int(os.getenv('DIAS_HISTORIAL_LIMPIEZA', '30'))
-    
+    MAX_LIKES_PER_HOUR: int = 50
+    MAX_LIKES_PER_DAY: int = 200
+    DIAS_HISTORIAL_LIMPIEZA: int = 30
+    REPETIDOS_LOG_MAX: int = 0  # Avistamientos crudos a conservar (0 = desactivado)
+
+    # ==================== RETENCIÓN ====================
+    # 0 desactiva el límite correspondiente
+    RETENCION_AL_INICIO: bool = True
+    RETENCION_INTERVALO_HORAS: float = 24.0
+    RETENCION_HISTORIAL_MAX: int = 0
+    RETENCION_REPETIDOS_DIAS: int = 180
+    RETENCION_REPETIDOS_MAX: int = 0
+    RETENCION_BACKUPS_DIAS: int = 30
+    RETENCION_BACKUPS_MB: int = 0
+    RETENCION_CHECKPOINTS_DIAS: int = 7
+    RETENCION_LOGS_DIAS: int = 30
+    RETENCION_CUARENTENA_DIAS: int = 90
+    RETENCION_PERFILES_DIAS: int = 30
+    RETENCION_PERFILES_MAX: int = 50
+
     # ==================== LOGGING ====================
-    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
-    LOG_FILE: str = os.getenv('LOG_FILE', str(PROJECT_ROOT / 'logs' / 'bot.log'))
-    LOG_MAX_BYTES: int = int(os.getenv('LOG_MAX_BYTES', '10485760'))  # 10MB
-    LOG_BACKUP_COUNT: int = int(os.getenv('LOG_BACKUP_COUNT', '5'))
-    
+    LOG_LEVEL: str = 'INFO'
+    LOG_FILE: str = str(PROJECT_ROOT / 'logs' / 'bot.log')
+    LOG_MAX_BYTES: int = 10485760  # 10MB
+    LOG_BACKUP_COUNT: int = 5
+
+    # ==================== PERFILADO ====================
+    BOT_PROFILE: str = ''  # '' (desactivado) | cpu | mem
+    PROFILE_DIR: str = str(PROJECT_ROOT / 'profiles')
+    PROFILE_TOP_N: int = 20
+
+    # ==================== PERSISTENCIA ====================
+    DURABILIDAD: str = 'group-commit'  # none | fsync | group-commit
+    RETRY_IO_MAX_ATTEMPTS: int = 5
+    RETRY_IO_BASE_DELAY: float = 0.05
+    RETRY_IO_MAX_DELAY: float = 0.5
+    RETRY_IO_DEADLINE: float = 2.0  # Presupuesto total por operación de E/S (segundos)
+    HISTORIAL_DIARIO_KB: int = 1024  # Tamaño del diario de anexos a partir del cual se pliega en el historial
+
     # ==================== BACKUPS ====================
-    BACKUP_ENABLED: bool = os.getenv('BACKUP_ENABLED', 'true').lower() == 'true'
-    BACKUP_DIR: str = os.getenv('BACKUP_DIR', str(PROJECT_ROOT / 'backups'))
-    MAX_BACKUPS: int = int(os.getenv('MAX_BACKUPS', '10'))
-    
+    BACKUP_ENABLED: bool = True
+    BACKUP_DIR: str = str(PROJECT_ROOT / 'backups')
+    MAX_BACKUPS: int = 10
+    MAX_SNAPSHOTS: int = 10
+
+    # ==================== EXPORTACIÓN ====================
+    EXPORT_DIR: str = str(PROJECT_ROOT / 'exports')
+
     # ==================== USER AGENTS ====================
-    USER_AGENTS: List[str] = os.getenv(
-        'USER_AGENTS',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36,'
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36,'
+    USER_AGENTS: List[str] = [
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    ).split(',')
-    
+    ]
+
+    @field_validator('HEADLESS_MODE', 'BACKUP_ENABLED', 'RETENCION_AL_INICIO', mode='before')
+    @classmethod
+    def _parse_bool(cls, value: Any) -> Any:
+        # Igual que antes: solo 'true' (sin distinguir mayúsculas) activa la opción
+        if isinstance(value, str):
+            return value.strip().lower() == 'true'
+        return value
+
+    @field_validator('USER_AGENTS', mode='before')
+    @classmethod
+    def _split_user_agents(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return [ua.strip() for ua in value.split(',') if ua.strip()]
+        return value
+
+    @field_validator('DURABILIDAD')
+    @classmethod
+    def _check_durabilidad(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in ('none', 'fsync', 'group-commit'):
+            raise ValueError(f"DURABILIDAD inválida: {value} (none | fsync | group-commit)")
+        return value
+
+    @field_validator('BOT_PROFILE')
+    @classmethod
+    def _check_profile(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in ('', 'cpu', 'mem'):
+            raise ValueError(f"BOT_PROFILE inválido: {value} (cpu | mem)")
+        return value
+
+    @field_validator('LOG_LEVEL')
+    @classmethod
+    def _check_log_level(cls, value: str) -> str:
+        value = value.upper()
+        if value not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            raise ValueError(f"LOG_LEVEL inválido: {value}")
+        return value
+
+
+class _ConfigMeta(type):
+    """Delega los atributos de `Config` en el modelo `Settings` cacheado"""
+
+    def __getattr__(cls, name: str) -> Any:
+        if name in Settings.model_fields:
+            return getattr(cls.settings(), name)
+        raise AttributeError(f"Config no tiene el atributo '{name}'")
+
+
+class Config(metaclass=_ConfigMeta):
+    """Configuración centralizada del bot"""
+
+    _settings: Optional[Settings] = None
+    _env_path: Optional[str] = None
+    _env_mtime: Optional[float] = None
+    _last_check: float = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def _find_env(cls) -> Optional[str]:
+        """Ubica el archivo .env (una sola vez)"""
+        if cls._env_path is None:
+            # Mismo criterio que load_dotenv(): desde el proyecto hacia arriba
+            candidatos = (d / '.env' for d in (PROJECT_ROOT, *PROJECT_ROOT.parents))
+            cls._env_path = next((str(p) for p in candidatos if p.is_file()), '')
+        return cls._env_path or None
+
+    @staticmethod
+    def _mtime(path: Optional[str]) -> Optional[float]:
+        try:
+            return os.path.getmtime(path) if path else None
+        except OSError:
+            return None
+
+    @classmethod
+    def _build(cls) -> Settings:
+        """Construye y valida el modelo desde .env y el entorno (el entorno tiene prioridad)"""
+        env_path = cls._find_env()
+        valores = dict(dotenv_values(env_path)) if env_path else {}
+        valores.update(os.environ)
+
+        settings = Settings(**{
+            nombre: valores[nombre]
+            for nombre in Settings.model_fields
+            if valores.get(nombre) is not None
+        })
+
+        cls._env_mtime = cls._mtime(env_path)
+        return settings
+
+    @classmethod
+    def settings(cls) -> Settings:
+        """Retorna el modelo vigente, construyéndolo o recargándolo si hace falta"""
+        if cls._settings is None:
+            with cls._lock:
+                if cls._settings is None:
+                    cls._settings = cls._build()
+                    cls._last_check = time.monotonic()
+        else:
+            cls.reload_if_changed()
+        return cls._settings
+
+    @classmethod
+    def reload_if_changed(cls, force: bool = False) -> bool:
+        """
+        Recarga la configuración si el mtime de .env cambió
+
+        Si el .env nuevo no valida (p. ej. MAX_BACKUPS=3x) se registra el
+        error y se conserva la configuración anterior; no se vuelve a
+        intentar hasta que el archivo cambie otra vez.
+
+        Args:
+            force: Comprobar aunque no haya pasado RELOAD_CHECK_INTERVAL
+
+        Returns:
+            True si se recargó
+        """
+        ahora = time.monotonic()
+        if not force and ahora - cls._last_check < RELOAD_CHECK_INTERVAL:
+            return False
+        cls._last_check = ahora
+
+        # Si no había .env, volver a buscarlo por si se creó después
+        if cls._env_path == '':
+            cls._env_path = None
+
+        mtime = cls._mtime(cls._find_env())
+        if mtime == cls._env_mtime:
+            return False
+
+        with cls._lock:
+            try:
+                cls._settings = cls._build()
+            except ValidationError as e:
+                cls._env_mtime = mtime
+                # logger importa config: se usa el logger por nombre para no crear un ciclo
+                logging.getLogger(LOGGER_NAME).error(
+                    f"Configuración inválida en {cls._env_path}; se mantiene la anterior: {e}"
+                )
+                return False
+        return True
+
+    @classmethod
+    def reset(cls):
+        """Descarta la configuración cacheada (se reconstruye en el próximo acceso)"""
+        with cls._lock:
+            cls._settings = None
+            cls._env_path = None
+            cls._env_mtime = None
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        """Retorna una copia de la configuración efectiva (útil para logging)"""
+        return cls.settings().model_dump()
+
     @classmethod
     def validate(cls) -> bool:
-        """Valida que las rutas críticas existan"""
+        """Valida la configuración y crea los directorios necesarios"""
+        settings = cls.settings()
+
         # Crear directorios si no existen
-        os.makedirs(cls.DATA_DIR, exist_ok=True)
-        os.makedirs(os.path.dirname(cls.LOG_FILE), exist_ok=True)
-        
-        if cls.BACKUP_ENABLED:
-            os.makedirs(cls.BACKUP_DIR, exist_ok=True)
-        
+        os.makedirs(settings.DATA_DIR, exist_ok=True)
+        os.makedirs(os.path.dirname(settings.LOG_FILE), exist_ok=True)
+
+        if settings.BACKUP_ENABLED:
+            os.makedirs(settings.BACKUP_DIR, exist_ok=True)
+
         return True
-    
+
     @classmethod
     def get_random_user_agent(cls) -> str:
         """Retorna un User-Agent aleatorio"""
-        import random
-        return random.choice(cls.USER_AGENTS).strip()
-
-
-# Validar configuración al importar
-Config.validate()
+        return random.choice(cls.settings().USER_AGENTS)
@@ -0,0 +1,180 @@
+"""
+Esquema versionado de los archivos de datos
+Cada archivo se guarda con una cabecera que indica su versión y si ya fue validado,
+de modo que la validación por registro se hace una sola vez
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from utils import DatosCorruptosError
+
+# Versión actual del formato en disco (0 = archivos antiguos sin cabecera)
+SCHEMA_VERSION = 1
+
+# Clave de la cabecera; debe ser la primera del objeto para poder leerlo en streaming
+CLAVE_ESQUEMA = '_schema'
+CLAVE_DATOS = 'datos'
+
+# Nombre de archivo -> dataset
+DATASETS = {
+    'usuarios_base.json': 'base',
+    'usuarios_principales.json': 'principales',
+    'historial_entregados.json': 'historial',
+    'usuarios_repetidos.json': 'repetidos',
+    'usuarios_repetidos_log.json': 'repetidos_log',
+    'indice_entregas.json': 'indice_entregas',
+    'indice_usuarios.json': 'indice_usuarios',
+}
+
+
+def dataset_de(path_o_nombre: str) -> str:
+    """Nombre del dataset de un archivo de datos"""
+    nombre = path_o_nombre.replace('\\', '/').rsplit('/', 1)[-1]
+    return DATASETS.get(nombre, nombre.rsplit('.', 1)[0])
+
+
+# ==================== VALIDADORES ====================
+
+def _es_usuario(valor: Any) -> bool:
+    return isinstance(valor, str) and bool(valor.strip())
+
+
+def _es_fecha(valor: Any) -> bool:
+    if not isinstance(valor, str):
+        return False
+    try:
+        datetime.fromisoformat(valor)
+        return True
+    except ValueError:
+        return False
+
+
+def _es_avistamiento(registro: Any) -> bool:
+    return (
+        isinstance(registro, dict)
+        and _es_usuario(registro.get('usuario'))
+        and _es_fecha(registro.get('fecha'))
+    )
+
+
+def _es_entrega(registro: Any) -> bool:
+    return _es_avistamiento(registro) and (
+        registro.get('keyword') is None or isinstance(registro['keyword'], str)
+    )
+
+
+def _es_agregado(agregado: Any) -> bool:
+    return (
+        isinstance(agregado, dict)
+        and isinstance(agregado.get('count'), int)
+        and agregado['count'] >= 1
+        and _es_fecha(agregado.get('first_seen'))
+        and _es_fecha(agregado.get('last_seen'))
+    )
+
+
+def _validar_lista(data: Any, es_valido) -> Tuple[List, List]:
+    validos, invalidos = [], []
+    for registro in data:
+        (validos if es_valido(registro) else invalidos).append(registro)
+    return validos, invalidos
+
+
+def validar(dataset: str, data: Any) -> Tuple[Any, List]:
+    """
+    Valida los registros de un dataset
+
+    Args:
+        dataset: Nombre del dataset
+        data: Contenido del archivo (sin cabecera)
+
+    Returns:
+        Tupla (datos válidos, registros inválidos)
+
+    Raises:
+        DatosCorruptosError: Si la estructura global no corresponde al dataset
+    """
+    if dataset in ('base', 'principales'):
+        if not isinstance(data, list):
+            raise DatosCorruptosError(f"{dataset}: se esperaba una lista de usuarios")
+        return _validar_lista(data, _es_usuario)
+
+    if dataset == 'historial':
+        if not isinstance(data, list):
+            raise DatosCorruptosError("historial: se esperaba una lista de registros")
+        return _validar_lista(data, _es_entrega)
+
+    if dataset == 'repetidos_log':
+        if not isinstance(data, list):
+            raise DatosCorruptosError("repetidos_log: se esperaba una lista de avistamientos")
+        return _validar_lista(data, _es_avistamiento)
+
+    if dataset == 'repetidos':
+        if isinstance(data, list):
+            # Formato antiguo: un avistamiento por registro
+            return _validar_lista(data, _es_avistamiento)
+        if not isinstance(data, dict):
+            raise DatosCorruptosError("repetidos: se esperaba un objeto de agregados")
+        validos, invalidos = {}, []
+        for usuario, agregado in data.items():
+            if _es_usuario(usuario) and _es_agregado(agregado):
+                validos[usuario] = agregado
+            else:
+                invalidos.append({usuario: agregado})
+        return validos, invalidos
+
+    if dataset == 'indice_entregas':
+        if not (isinstance(data, dict)
+                and isinstance(data.get('usuarios', {}), dict)
+                and isinstance(data.get('keywords', {}), dict)):
+            raise DatosCorruptosError("indice_entregas: estructura inválida")
+        return data, []
+
+    if dataset == 'indice_usuarios':
+        if not (isinstance(data, dict)
+                and isinstance(data.get('usuarios', {}), dict)
+                and isinstance(data.get('firmas', {}), dict)):
+            raise DatosCorruptosError("indice_usuarios: estructura inválida")
+        return data, []
+
+    # Dataset sin validador conocido
+    return data, []
+
+
+# ==================== CABECERA ====================
+
+def envolver(dataset: str, data: Any, limpio: bool = True, extra: Dict = None) -> Dict:
+    """Agrega la cabecera de esquema a los datos (`extra`: campos adicionales de la cabecera)"""
+    return {
+        CLAVE_ESQUEMA: {
+            'dataset': dataset,
+            'version': SCHEMA_VERSION,
+            'limpio': limpio,
+            'actualizado': datetime.now().isoformat(),
+            **(extra or {})
+        },
+        CLAVE_DATOS: data
+    }
+
+
+def desenvolver(raw: Any) -> Tuple[Any, Optional[Dict]]:
+    """
+    Separa la cabecera de los datos
+
+    Returns:
+        Tupla (datos, cabecera); cabecera es None en archivos antiguos
+    """
+    if isinstance(raw, dict) and CLAVE_ESQUEMA in raw:
+        cabecera = raw[CLAVE_ESQUEMA]
+        if not isinstance(cabecera, dict) or CLAVE_DATOS not in raw:
+            raise DatosCorruptosError("Cabecera de esquema inválida")
+        version = cabecera.get('version')
+        if not isinstance(version, int) or version > SCHEMA_VERSION:
+            raise DatosCorruptosError(f"Versión de esquema no soportada: {version}")
+        return raw[CLAVE_DATOS], cabecera
+    return raw, None
+
+
+def es_limpio(cabecera: Optional[Dict]) -> bool:
+    """Indica si un archivo puede cargarse sin validar registro a registro"""
+    return bool(cabecera) and cabecera.get('version') == SCHEMA_VERSION and cabecera.get('limpio') is True
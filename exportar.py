@@ -0,0 +1,237 @@
+"""
+Exportación en streaming de los archivos de datos a CSV/Parquet
+Lee los JSON elemento a elemento y escribe por bloques con memoria constante
+"""
+
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from esquema import CLAVE_DATOS, CLAVE_ESQUEMA
+
+# Columnas exportadas: (nombre, tipo) con tipo en {'str', 'int', 'fecha'}
+Esquema = List[Tuple[str, str]]
+
+
+class _LectorJson:
+    """Lector incremental de un documento JSON sobre un archivo de texto"""
+
+    def __init__(self, f, tam_bloque: int):
+        self.f = f
+        self.tam_bloque = tam_bloque
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _rellenar(self) -> bool:
+        if self.eof:
+            return False
+        bloque = self.f.read(self.tam_bloque)
+        if not bloque:
+            self.eof = True
+            return False
+        # Descartar lo ya consumido para mantener el buffer acotado
+        self.buf = self.buf[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def caracter(self) -> str:
+        """Retorna el siguiente carácter no blanco sin consumirlo ('' al final)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._rellenar():
+                return ''
+
+    def esperar(self, esperados: str) -> str:
+        """Consume el siguiente carácter, que debe ser uno de `esperados`"""
+        c = self.caracter()
+        if not c or c not in esperados:
+            raise ValueError(f"JSON inválido: se esperaba uno de {esperados!r} y se encontró {c!r}")
+        self.pos += 1
+        return c
+
+    def valor(self) -> Any:
+        """Decodifica el siguiente valor JSON completo"""
+        self.caracter()
+        while True:
+            try:
+                valor, fin = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._rellenar():
+                    raise
+                continue
+            # Un número al final del buffer puede estar incompleto
+            if fin == len(self.buf) and self._rellenar():
+                continue
+            self.pos = fin
+            return valor
+
+
+def _iterar_contenedor(lector: _LectorJson) -> Iterator[Any]:
+    """Itera el array u objeto que empieza en la posición actual del lector"""
+    apertura = lector.esperar('[{')
+    cierre = ']' if apertura == '[' else '}'
+
+    if lector.caracter() == cierre:
+        lector.pos += 1
+        return
+
+    while True:
+        if apertura == '[':
+            yield lector.valor()
+        else:
+            clave = lector.valor()
+            lector.esperar(':')
+            yield clave, lector.valor()
+
+        if lector.esperar(',' + cierre) == cierre:
+            return
+
+
+def iterar_json(path: str, tam_bloque: int = 1 << 16) -> Iterator[Any]:
+    """
+    Itera un archivo JSON sin cargarlo completo en memoria
+
+    Los archivos con cabecera de esquema ({"_schema": ..., "datos": ...})
+    se iteran sobre el contenido de "datos".
+
+    Args:
+        path: Archivo cuyo valor raíz (o "datos") es un array o un objeto
+        tam_bloque: Caracteres leídos por bloque
+
+    Yields:
+        Elementos del array, o tuplas (clave, valor) si es un objeto
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lector = _LectorJson(f, tam_bloque)
+
+        if lector.caracter() != '{':
+            yield from _iterar_contenedor(lector)
+            return
+
+        lector.esperar('{')
+        if lector.caracter() == '}':
+            return
+
+        clave = lector.valor()
+        lector.esperar(':')
+
+        if clave == CLAVE_ESQUEMA:
+            # Sobre versionado: la cabecera va primero y luego los datos
+            lector.valor()
+            lector.esperar(',')
+            clave = lector.valor()
+            lector.esperar(':')
+            if clave != CLAVE_DATOS:
+                raise ValueError(f"JSON inválido: se esperaba la clave {CLAVE_DATOS!r} tras la cabecera")
+            yield from _iterar_contenedor(lector)
+            return
+
+        # Objeto plano: la primera clave ya se consumió
+        yield clave, lector.valor()
+        while lector.esperar(',}') == ',':
+            clave = lector.valor()
+            lector.esperar(':')
+            yield clave, lector.valor()
+
+
+def leer_cabecera(path: str) -> Optional[Dict]:
+    """Cabecera de esquema de un archivo de datos sin leer el resto (None si no tiene)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lector = _LectorJson(f, 4096)
+        if lector.caracter() != '{':
+            return None
+        lector.esperar('{')
+        if lector.caracter() == '}':
+            return None
+        if lector.valor() != CLAVE_ESQUEMA:
+            return None
+        lector.esperar(':')
+        cabecera = lector.valor()
+        return cabecera if isinstance(cabecera, dict) else None
+
+
+def parsear_fecha(valor: Any) -> datetime:
+    """
+    Convierte una fecha ISO del historial en datetime naive
+
+    Las fechas con zona horaria (el esquema las acepta) se pasan a hora
+    local sin zona, como las que genera el bot, para poder compararlas.
+    """
+    fecha = datetime.fromisoformat(valor)
+    return fecha.astimezone().replace(tzinfo=None) if fecha.tzinfo else fecha
+
+
+def _formatear_csv(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return '' if valor is None else valor
+
+
+def _bloques(filas: Iterable[Dict], tam_bloque: int) -> Iterator[List[Dict]]:
+    iterador = iter(filas)
+    while True:
+        bloque = list(islice(iterador, tam_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def escribir_csv(filas: Iterable[Dict], path: str, esquema: Esquema, tam_bloque: int = 10_000) -> int:
+    """
+    Escribe filas en CSV por bloques
+
+    Returns:
+        Número de filas escritas
+    """
+    columnas = [nombre for nombre, _ in esquema]
+    total = 0
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columnas)
+        for bloque in _bloques(filas, tam_bloque):
+            writer.writerows([_formatear_csv(fila.get(c)) for c in columnas] for fila in bloque)
+            total += len(bloque)
+
+    return total
+
+
+def parquet_disponible() -> bool:
+    """Indica si pyarrow está instalado"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def escribir_parquet(filas: Iterable[Dict], path: str, esquema: Esquema, tam_bloque: int = 10_000) -> int:
+    """
+    Escribe filas en Parquet, un row group por bloque (requiere pyarrow)
+
+    Returns:
+        Número de filas escritas
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("La exportación a Parquet requiere pyarrow (pip install pyarrow)") from e
+
+    tipos = {'str': pa.string(), 'int': pa.int64(), 'fecha': pa.timestamp('us')}
+    schema = pa.schema([(nombre, tipos[tipo]) for nombre, tipo in esquema])
+    total = 0
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for bloque in _bloques(filas, tam_bloque):
+            columnas = {nombre: [fila.get(nombre) for fila in bloque] for nombre, _ in esquema}
+            writer.write_table(pa.table(columnas, schema=schema))
+            total += len(bloque)
+
+    return total
@@ -0,0 +1,163 @@
+"""
+Modelo compacto en memoria para el historial de entregas
+Struct-of-arrays con textos internados y fechas enteras en lugar de una lista de dicts
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Fechas como microsegundos desde esta época (naive, igual que datetime.now().isoformat())
+_EPOCA = datetime(1970, 1, 1)
+_MICRO = timedelta(microseconds=1)
+
+# Claves con columna propia; cualquier otra se guarda aparte en `_extras`
+_CLAVES_COLUMNAS = ('usuario', 'keyword', 'fecha', 'tipo')
+
+# Marca de registro sin clave 'fecha'
+_SIN_FECHA = object()
+
+
+def _a_micro(fecha: datetime) -> int:
+    return (fecha - _EPOCA) // _MICRO
+
+
+def _desde_micro(valor: int) -> datetime:
+    return _EPOCA + timedelta(microseconds=valor)
+
+
+class HistorialCompacto:
+    """
+    Registros {usuario, fecha, keyword?, tipo?} en columnas paralelas
+
+    - usuarios / keywords / tipos: array('I') de ids en una tabla de textos
+      compartida (cada string distinto se guarda una sola vez; 0 = ausente)
+    - fechas: array('q') con microsegundos desde 1970 (8 bytes por registro)
+
+    La conversión es sin pérdida: las fechas que no vuelven idénticas a su
+    ISO original (zona horaria, precisión distinta, valores inválidos) y las
+    claves adicionales se guardan aparte por índice. Un registro ocupa ~20
+    bytes frente a los ~400 de un dict con sus strings.
+    """
+
+    def __init__(self):
+        self._textos: List[Optional[str]] = [None]
+        self._ids: Dict[str, int] = {}
+        self.usuarios = array('I')
+        self.keywords = array('I')
+        self.tipos = array('I')
+        self.fechas = array('q')
+        self._fechas_raw: Dict[int, object] = {}
+        self._extras: Dict[int, Dict] = {}
+
+    @classmethod
+    def desde_registros(cls, registros: Iterable[Dict]) -> 'HistorialCompacto':
+        """Construye el modelo desde registros con la forma del JSON (acepta generadores)"""
+        historial = cls()
+        historial.extend(registros)
+        return historial
+
+    # ==================== ESCRITURA ====================
+
+    def _id(self, texto) -> int:
+        id_texto = self._ids.get(texto)
+        if id_texto is None:
+            id_texto = len(self._textos)
+            self._textos.append(texto)
+            self._ids[texto] = id_texto
+        return id_texto
+
+    def _id_opcional(self, registro: Dict, clave: str, extras: Dict) -> int:
+        if clave not in registro:
+            return 0
+        valor = registro[clave]
+        if isinstance(valor, str):
+            return self._id(valor)
+        # None explícito u otro tipo: se conserva tal cual
+        extras[clave] = valor
+        return 0
+
+    def agregar(self, registro: Dict):
+        """Agrega un registro en O(1)"""
+        indice = len(self.fechas)
+        extras = {}
+
+        usuario = registro.get('usuario')
+        if isinstance(usuario, str):
+            self.usuarios.append(self._id(usuario))
+        else:
+            self.usuarios.append(0)
+            if 'usuario' in registro:
+                extras['usuario'] = usuario
+
+        self.keywords.append(self._id_opcional(registro, 'keyword', extras))
+        self.tipos.append(self._id_opcional(registro, 'tipo', extras))
+
+        fecha = registro.get('fecha')
+        micro = None
+        if isinstance(fecha, str):
+            try:
+                dt = datetime.fromisoformat(fecha)
+                if dt.tzinfo is None and dt.isoformat() == fecha:
+                    micro = _a_micro(dt)
+            except ValueError:
+                pass
+        if micro is None:
+            micro = 0
+            self._fechas_raw[indice] = fecha if 'fecha' in registro else _SIN_FECHA
+        self.fechas.append(micro)
+
+        for clave, valor in registro.items():
+            if clave not in _CLAVES_COLUMNAS:
+                extras[clave] = valor
+        if extras:
+            self._extras[indice] = extras
+
+    def extend(self, registros: Iterable[Dict]):
+        for registro in registros:
+            self.agregar(registro)
+
+    # ==================== LECTURA ====================
+
+    def __len__(self) -> int:
+        return len(self.fechas)
+
+    def registro(self, indice: int) -> Dict:
+        """Registro con la forma del JSON original"""
+        textos = self._textos
+        extras = self._extras.get(indice, {})
+        registro = {}
+
+        if self.usuarios[indice]:
+            registro['usuario'] = textos[self.usuarios[indice]]
+        elif 'usuario' in extras:
+            registro['usuario'] = extras['usuario']
+
+        if self.keywords[indice]:
+            registro['keyword'] = textos[self.keywords[indice]]
+        elif 'keyword' in extras:
+            registro['keyword'] = extras['keyword']
+
+        fecha = self._fechas_raw.get(indice)
+        if fecha is None and indice not in self._fechas_raw:
+            registro['fecha'] = _desde_micro(self.fechas[indice]).isoformat()
+        elif fecha is not _SIN_FECHA:
+            registro['fecha'] = fecha
+
+        if self.tipos[indice]:
+            registro['tipo'] = textos[self.tipos[indice]]
+        elif 'tipo' in extras:
+            registro['tipo'] = extras['tipo']
+
+        for clave, valor in extras.items():
+            if clave not in _CLAVES_COLUMNAS:
+                registro[clave] = valor
+        return registro
+
+    def __iter__(self) -> Iterator[Dict]:
+        for indice in range(len(self)):
+            yield self.registro(indice)
+
+    def iterar_json(self) -> Iterator[Dict]:
+        """Registros con la forma del JSON, para serializar en streaming"""
+        return iter(self)
@@ -0,0 +1,215 @@
+"""
+Importación masiva en streaming de listas de usuarios (CSV / TXT / JSON)
+Deduplica contra usuarios_principales con un conjunto compacto de hashes y escribe por bloques
+"""
+
+import csv
+import os
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from exportar import iterar_json
+from persistencia import EscritorLista
+from utils import normalizar_usuario
+
+FORMATOS_IMPORTACION = ('csv', 'txt', 'json')
+
+# Columnas reconocidas como username en CSV con cabecera
+COLUMNAS_USUARIO = ('usuario', 'username', 'user', 'screen_name', 'handle')
+
+# Usernames válidos de X/Twitter
+PATRON_USUARIO = re.compile(r'[A-Za-z0-9_]{1,15}')
+
+_MASCARA_64 = (1 << 64) - 1
+
+
+class ConjuntoHashes:
+    """
+    Conjunto de hashes de 64 bits con direccionamiento abierto sobre un array('Q')
+
+    Ocupa ~16 bytes por elemento (factor de carga <= 0.5) frente a los ~100
+    de un set de str. Se guarda solo el hash: con 10M de usuarios la
+    probabilidad de una colisión es del orden de 1e-6.
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        tamano = 1 << max(10, (capacidad * 2 - 1).bit_length())
+        self._tabla = array('Q', bytes(8 * tamano))
+        self._mascara = tamano - 1
+        self._elementos = 0
+
+    @staticmethod
+    def _hash(clave: str) -> int:
+        # 0 marca una celda vacía
+        return (hash(clave) & _MASCARA_64) or 1
+
+    def _insertar(self, h: int) -> bool:
+        tabla, mascara = self._tabla, self._mascara
+        i = h & mascara
+        while True:
+            actual = tabla[i]
+            if actual == 0:
+                tabla[i] = h
+                self._elementos += 1
+                if self._elementos * 2 > len(tabla):
+                    self._crecer()
+                return True
+            if actual == h:
+                return False
+            i = (i + 1) & mascara
+
+    def _crecer(self):
+        anterior = self._tabla
+        self._tabla = array('Q', bytes(8 * len(anterior) * 2))
+        self._mascara = len(self._tabla) - 1
+        self._elementos = 0
+        for h in anterior:
+            if h:
+                self._insertar(h)
+
+    def agregar(self, clave: str) -> bool:
+        """Agrega la clave; retorna False si ya estaba"""
+        return self._insertar(self._hash(clave))
+
+    def __contains__(self, clave: str) -> bool:
+        h = self._hash(clave)
+        tabla, mascara = self._tabla, self._mascara
+        i = h & mascara
+        while tabla[i]:
+            if tabla[i] == h:
+                return True
+            i = (i + 1) & mascara
+        return False
+
+    def __len__(self) -> int:
+        return self._elementos
+
+    def bytes_usados(self) -> int:
+        return self._tabla.itemsize * len(self._tabla)
+
+
+# ==================== LECTORES ====================
+
+def detectar_formato(path: str) -> str:
+    """Formato de importación según la extensión (txt por defecto)"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in FORMATOS_IMPORTACION else 'txt'
+
+
+def _iterar_txt(path: str) -> Iterator[str]:
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for linea in f:
+            linea = linea.strip()
+            if linea and not linea.startswith('#'):
+                yield linea
+
+
+def _iterar_csv(path: str, columna: Optional[str]) -> Iterator[str]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        lector = csv.reader(f)
+        primera = next(lector, None)
+        if primera is None:
+            return
+
+        cabecera = [c.strip().lower() for c in primera]
+        nombres = (columna.lower(),) if columna else COLUMNAS_USUARIO
+        indice = next((cabecera.index(n) for n in nombres if n in cabecera), None)
+
+        if indice is None:
+            if columna:
+                raise ValueError(f"{path}: no existe la columna '{columna}'")
+            # Sin cabecera reconocible: primera columna y la primera fila es un dato
+            indice = 0
+            if primera:
+                yield primera[0]
+
+        for fila in lector:
+            if len(fila) > indice:
+                yield fila[indice]
+
+
+def _iterar_json_usuarios(path: str, columna: Optional[str]) -> Iterator[str]:
+    claves = (columna,) if columna else COLUMNAS_USUARIO
+    for elemento in iterar_json(path):
+        if isinstance(elemento, str):
+            yield elemento
+        elif isinstance(elemento, dict):
+            valor = next((elemento[c] for c in claves if isinstance(elemento.get(c), str)), None)
+            if valor is not None:
+                yield valor
+        elif isinstance(elemento, tuple):
+            # Objeto {usuario: datos}, como usuarios_repetidos.json
+            yield elemento[0]
+
+
+def iterar_usuarios(path: str, formato: str = None, columna: str = None) -> Iterator[str]:
+    """
+    Itera los usernames crudos de un archivo sin cargarlo completo
+
+    Args:
+        path: Archivo a importar
+        formato: 'csv', 'txt' o 'json' (por extensión si es None)
+        columna: Columna (CSV) o clave (JSON) con el username
+    """
+    formato = formato or detectar_formato(path)
+    if formato == 'csv':
+        return _iterar_csv(path, columna)
+    if formato == 'json':
+        return _iterar_json_usuarios(path, columna)
+    if formato == 'txt':
+        return _iterar_txt(path)
+    raise ValueError(f"Formato de importación inválido: {formato} ({', '.join(FORMATOS_IMPORTACION)})")
+
+
+def limpiar_usuario(valor: str) -> Optional[str]:
+    """Username sin espacios ni '@', o None si no es válido"""
+    usuario = valor.strip().lstrip('@')
+    return usuario if PATRON_USUARIO.fullmatch(usuario) else None
+
+
+# ==================== ESCRITURA ====================
+
+def importar_en_streaming(
+    existentes: Iterable,
+    fuentes: Iterable[str],
+    escritor: EscritorLista,
+    capacidad: int = 1024
+) -> Tuple[Dict[str, int], List]:
+    """
+    Copia los usuarios existentes y anexa los nuevos de `fuentes` sin duplicados
+
+    Args:
+        existentes: Usuarios ya guardados (se copian tal cual, en orden)
+        fuentes: Usernames crudos a importar
+        escritor: Destino por bloques
+        capacidad: Estimación inicial del número de usuarios
+
+    Returns:
+        Tupla (conteos, registros existentes no válidos que no se copiaron)
+    """
+    vistos = ConjuntoHashes(capacidad)
+    conteo = {'existentes': 0, 'leidos': 0, 'agregados': 0, 'duplicados': 0, 'invalidos': 0}
+    descartados = []
+
+    for usuario in existentes:
+        if not (isinstance(usuario, str) and usuario.strip()):
+            descartados.append(usuario)
+            continue
+        vistos.agregar(normalizar_usuario(usuario))
+        escritor.escribir(usuario)
+        conteo['existentes'] += 1
+
+    for valor in fuentes:
+        conteo['leidos'] += 1
+        usuario = limpiar_usuario(valor) if isinstance(valor, str) else None
+        if usuario is None:
+            conteo['invalidos'] += 1
+        elif vistos.agregar(normalizar_usuario(usuario)):
+            escritor.escribir(usuario)
+            conteo['agregados'] += 1
+        else:
+            conteo['duplicados'] += 1
+
+    escritor.cerrar()
+    conteo['memoria_hashes'] = vistos.bytes_usados()
+    return conteo, descartados
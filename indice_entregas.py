@@ -0,0 +1,122 @@
+"""
+Índice persistente de última entrega por usuario
+Permite seleccionar usuarios sin recorrer todo el historial
+"""
+
+import heapq
+import random
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+class IndiceEntregas:
+    """Mantiene la fecha de última entrega (epoch) por usuario y por keyword"""
+
+    def __init__(self, usuarios: Dict[str, float] = None, keywords: Dict[str, Dict[str, float]] = None):
+        self.usuarios: Dict[str, float] = usuarios or {}
+        self.keywords: Dict[str, Dict[str, float]] = keywords or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'IndiceEntregas':
+        """Construye el índice desde su representación JSON"""
+        return cls(
+            usuarios=dict(data.get('usuarios', {})),
+            keywords={kw: dict(mapa) for kw, mapa in data.get('keywords', {}).items()}
+        )
+
+    @classmethod
+    def desde_historial(cls, historial: Iterable[Dict]) -> 'IndiceEntregas':
+        """
+        Reconstruye el índice recorriendo el historial completo (solo en migración)
+
+        Args:
+            historial: Registros {usuario, fecha, keyword?}
+
+        Returns:
+            Índice con la última entrega de cada usuario
+        """
+        indice = cls()
+        for entry in historial:
+            try:
+                ts = datetime.fromisoformat(entry['fecha']).timestamp()
+                indice.registrar(entry['usuario'], ts, entry.get('keyword'))
+            except (KeyError, ValueError, TypeError, AttributeError):
+                continue
+        return indice
+
+    def to_dict(self) -> Dict:
+        """Representación serializable del índice"""
+        return {'usuarios': self.usuarios, 'keywords': self.keywords}
+
+    def registrar(self, usuario: str, ts: float, keyword: Optional[str] = None):
+        """Registra una entrega en O(1), conservando siempre la más reciente"""
+        if ts > self.usuarios.get(usuario, 0.0):
+            self.usuarios[usuario] = ts
+
+        if keyword is not None:
+            por_keyword = self.keywords.setdefault(keyword, {})
+            if ts > por_keyword.get(usuario, 0.0):
+                por_keyword[usuario] = ts
+
+    def ultima_entrega(self, usuario: str, keyword: Optional[str] = None) -> float:
+        """Epoch de la última entrega (0.0 si nunca se entregó)"""
+        if keyword is None:
+            return self.usuarios.get(usuario, 0.0)
+        return self.keywords.get(keyword, {}).get(usuario, 0.0)
+
+    def bloqueados(self, desde: float, keyword: Optional[str] = None) -> set:
+        """Usuarios entregados después de `desde` (globalmente o para un keyword)"""
+        mapa = self.usuarios if keyword is None else self.keywords.get(keyword, {})
+        return {u for u, ts in mapa.items() if ts > desde}
+
+    def seleccionar_menos_recientes(
+        self,
+        candidatos: Iterable[str],
+        cantidad: int,
+        bloqueo_hasta: float = None,
+        desempate_aleatorio: bool = True,
+        rng: random.Random = None
+    ) -> List[str]:
+        """
+        Selecciona los `cantidad` usuarios que llevan más tiempo sin entregarse
+
+        Recorre los candidatos como generador y mantiene un heap de tamaño
+        `cantidad`, por lo que no construye la lista de disponibles:
+        O(N log K) en tiempo. Los candidatos repetidos se descartan al
+        recorrerlos (un set de referencias), así que siempre se devuelven K
+        usuarios distintos si los hay.
+
+        No es O(K log N): eso exigiría un heap persistente de todos los
+        principales ordenado por última entrega, y principales cambia en
+        cada scraping e importación sin pasar por este índice.
+
+        Args:
+            candidatos: Usuarios elegibles
+            cantidad: Número de usuarios a seleccionar (K)
+            bloqueo_hasta: Excluye usuarios entregados después de este epoch
+            desempate_aleatorio: Desempata al azar (si no, alfabéticamente)
+            rng: Generador aleatorio (para reproducibilidad)
+
+        Returns:
+            Usuarios seleccionados, del menos al más reciente
+        """
+        if cantidad <= 0:
+            return []
+
+        rng = rng or random
+        ultima = self.usuarios.get
+        vistos = set()
+
+        def claves():
+            for usuario in candidatos:
+                # Un usuario repetido en la fuente no debe ocupar dos plazas
+                if usuario in vistos:
+                    continue
+                vistos.add(usuario)
+                ts = ultima(usuario, 0.0)
+                if bloqueo_hasta is not None and ts > bloqueo_hasta:
+                    continue
+                desempate = rng.random() if desempate_aleatorio else usuario
+                yield ts, desempate, usuario
+
+        return [usuario for _, _, usuario in heapq.nsmallest(cantidad, claves())]
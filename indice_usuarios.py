@@ -0,0 +1,236 @@
+"""
+Índice invertido por usuario sobre principales, historial y repetidos
+Permite consultar la línea de tiempo completa de un usuario sin recorrer los tres archivos
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional
+from utils import normalizar_usuario
+
+
+class IndiceUsuarios:
+    """
+    Resumen por username normalizado:
+    {'nombre', 'principal', 'entregas': n, 'primera_entrega': fecha | None,
+     'ultima_entrega': [fecha, keyword] | None, 'repetido': {...} | None}
+
+    Solo se persiste el resumen, proporcional al número de usuarios y no al
+    historial. Las escrituras no lo reescriben: anexan un delta (ver
+    `aplicar_delta`) que se incorpora en la siguiente consulta. `firmas`
+    guarda el (tamaño, mtime_ns) de cada archivo fuente al sincronizar.
+
+    Las entregas individuales de la línea de tiempo no se persisten: se
+    toman del historial cargado en la consulta (`vincular_historial`).
+    """
+
+    # Versión del formato en disco (los índices anteriores se reconstruyen)
+    FORMATO = 2
+
+    def __init__(self, usuarios: Dict[str, Dict] = None, firmas: Dict[str, List[int]] = None):
+        self.usuarios: Dict[str, Dict] = usuarios or {}
+        self.firmas: Dict[str, List[int]] = firmas or {}
+        self._historial = None
+        self._posiciones: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional['IndiceUsuarios']:
+        """Construye el índice desde su representación JSON (None si es de otro formato)"""
+        if data.get('formato') != cls.FORMATO:
+            return None
+        return cls(dict(data.get('usuarios', {})), dict(data.get('firmas', {})))
+
+    @classmethod
+    def construir(
+        cls,
+        principales: Iterable[str],
+        historial: Iterable[Dict],
+        repetidos: Dict[str, Dict]
+    ) -> 'IndiceUsuarios':
+        """
+        Construye el índice con una pasada por cada dataset
+
+        Args:
+            principales: Usuarios principales
+            historial: Registros {usuario, fecha, keyword?, tipo?}
+            repetidos: Agregados {usuario: {count, first_seen, last_seen}}
+        """
+        indice = cls()
+        indice.registrar_principales(principales)
+        indice.registrar_entregas(historial)
+        for usuario, agregado in repetidos.items():
+            indice.actualizar_repetido(usuario, agregado)
+        return indice
+
+    def to_dict(self) -> Dict:
+        """Representación serializable del índice"""
+        return {'formato': self.FORMATO, 'firmas': self.firmas, 'usuarios': self.usuarios}
+
+    def __len__(self) -> int:
+        return len(self.usuarios)
+
+    # ==================== ACTUALIZACIÓN INCREMENTAL ====================
+
+    def _entrada(self, usuario: str) -> Dict:
+        clave = normalizar_usuario(usuario)
+        entrada = self.usuarios.get(clave)
+        if entrada is None:
+            entrada = {
+                'nombre': usuario.strip().lstrip('@'),
+                'principal': False,
+                'entregas': 0,
+                'primera_entrega': None,
+                'ultima_entrega': None,
+                'repetido': None
+            }
+            self.usuarios[clave] = entrada
+        return entrada
+
+    def registrar_principales(self, usuarios: Iterable[str]):
+        """Marca usuarios como presentes en usuarios_principales"""
+        for usuario in usuarios:
+            if isinstance(usuario, str) and usuario.strip():
+                self._entrada(usuario)['principal'] = True
+
+    def registrar_entregas(self, registros: Iterable[Dict]):
+        """Acumula entregas del historial en el resumen de cada usuario (O(1) por registro)"""
+        for registro in registros:
+            try:
+                fecha = registro['fecha']
+                entrada = self._entrada(registro['usuario'])
+            except (KeyError, TypeError, AttributeError):
+                continue
+
+            entrada['entregas'] += 1
+            if entrada['primera_entrega'] is None or fecha < entrada['primera_entrega']:
+                entrada['primera_entrega'] = fecha
+            ultima = entrada['ultima_entrega']
+            if ultima is None or fecha >= ultima[0]:
+                entrada['ultima_entrega'] = [fecha, registro.get('keyword')]
+
+    def actualizar_repetido(self, usuario: str, agregado: Dict):
+        """Reemplaza el agregado de repetidos de un usuario"""
+        self._entrada(usuario)['repetido'] = dict(agregado)
+
+    def aplicar_delta(self, delta: Dict):
+        """
+        Aplica un delta del diario del índice
+
+        Args:
+            delta: {'principales': [usuario, ...], 'entregas': [registro, ...],
+                    'repetidos': {usuario: agregado}} (todas las claves opcionales)
+        """
+        self.registrar_principales(delta.get('principales', ()))
+        self.registrar_entregas(delta.get('entregas', ()))
+        for usuario, agregado in delta.get('repetidos', {}).items():
+            self.actualizar_repetido(usuario, agregado)
+
+    # ==================== ENTREGAS (HISTORIAL) ====================
+
+    def vincular_historial(self, historial: List[Dict], usuarios: Iterable[str] = None):
+        """
+        Localiza las entregas de cada usuario en el historial cargado
+
+        Recorre el historial una vez (O(n)); cada username distinto se
+        normaliza una sola vez. Las posiciones de cada usuario quedan
+        ordenadas por fecha para filtrar rangos con bisect.
+
+        Args:
+            historial: Registros {usuario, fecha, ...} (tal como los carga el manager)
+            usuarios: Limitar a estos usuarios (todos si es None)
+        """
+        claves = None if usuarios is None else {normalizar_usuario(u) for u in usuarios}
+        normalizados: Dict[str, Optional[str]] = {}
+        posiciones: Dict[str, List[int]] = {}
+
+        for indice, registro in enumerate(historial):
+            usuario = registro.get('usuario')
+            clave = normalizados.get(usuario, '')
+            if clave == '':
+                clave = normalizar_usuario(usuario) if isinstance(usuario, str) else None
+                if claves is not None and clave not in claves:
+                    clave = None
+                normalizados[usuario] = clave
+            if clave is not None:
+                posiciones.setdefault(clave, []).append(indice)
+
+        fecha = self._fecha_registro(historial)
+        for clave, lista in posiciones.items():
+            # El historial se anexa en orden: normalmente ya está ordenado
+            if any(fecha(a) > fecha(b) for a, b in zip(lista, lista[1:])):
+                lista.sort(key=fecha)
+
+        self._historial = historial
+        self._posiciones = posiciones
+
+    @staticmethod
+    def _fecha_registro(historial: List[Dict]):
+        def fecha(indice: int) -> str:
+            valor = historial[indice].get('fecha')
+            return valor if isinstance(valor, str) else ''
+        return fecha
+
+    def _eventos_entrega(self, clave: str, desde: str = None, hasta: str = None) -> List[Dict]:
+        if self._historial is None:
+            return []
+
+        posiciones = self._posiciones.get(clave, [])
+        fecha = self._fecha_registro(self._historial)
+        inicio = bisect_left(posiciones, desde, key=fecha) if desde else 0
+        fin = bisect_right(posiciones, hasta, key=fecha) if hasta else len(posiciones)
+
+        eventos = []
+        for indice in posiciones[inicio:fin]:
+            registro = self._historial[indice]
+            eventos.append({
+                'fecha': registro['fecha'],
+                'evento': 'entrega',
+                'keyword': registro.get('keyword'),
+                'tipo': registro.get('tipo')
+            })
+        return eventos
+
+    # ==================== CONSULTAS ====================
+
+    def linea_de_tiempo(self, usuario: str, desde: str = None, hasta: str = None) -> Optional[Dict]:
+        """
+        Línea de tiempo de un usuario
+
+        Sin historial vinculado solo incluye los eventos de repetidos; el
+        resumen (total y última entrega) está siempre disponible en O(1).
+
+        Args:
+            usuario: Username (con o sin @, sin distinguir mayúsculas)
+            desde: Fecha ISO mínima de las entregas (opcional)
+            hasta: Fecha ISO máxima de las entregas (opcional)
+
+        Returns:
+            Diccionario con el estado del usuario y sus eventos ordenados,
+            o None si el usuario no aparece en ningún dataset
+        """
+        clave = normalizar_usuario(usuario)
+        entrada = self.usuarios.get(clave)
+        if entrada is None:
+            return None
+
+        eventos = self._eventos_entrega(clave, desde, hasta)
+        repetido = entrada['repetido']
+        if repetido:
+            eventos.append({'fecha': repetido['first_seen'], 'evento': 'primer_repetido'})
+            if repetido['last_seen'] != repetido['first_seen']:
+                eventos.append({'fecha': repetido['last_seen'], 'evento': 'ultimo_repetido'})
+            eventos.sort(key=lambda e: e['fecha'])
+
+        ultima = entrada['ultima_entrega']
+        return {
+            'usuario': entrada['nombre'],
+            'principal': entrada['principal'],
+            'total_entregas': entrada['entregas'],
+            'primera_entrega': entrada['primera_entrega'],
+            'ultima_entrega': {'fecha': ultima[0], 'keyword': ultima[1]} if ultima else None,
+            'repetido': repetido,
+            'eventos': eventos
+        }
+
+    def buscar(self, usuarios: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Consulta por lotes: línea de tiempo de cada usuario (None si no existe)"""
+        return {usuario: self.linea_de_tiempo(usuario) for usuario in usuarios}
@@ -4,23 +4,53 @@ Gestor de usuarios con logging, backups y validación mejorada
 
 import json
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Set
+from itertools import chain
+from typing import Iterable, Iterator, List, Dict, Optional, Set
 from logger import bot_logger, log_exception
 from backup import BackupManager
 from config import Config
+from indice_entregas import IndiceEntregas
+from indice_usuarios import IndiceUsuarios
+from asignacion import asignar_grupos, calcular_cupos
+from repetidos import RegistroRepetidos
+from utils import DatosCorruptosError, normalizar_usuario, politica_io, ruta_con_marca
+from esquema import CLAVE_ESQUEMA, dataset_de, desenvolver, envolver, es_limpio, validar
+from persistencia import (
+    EscritorLista, GrupoCommit, anexar_lineas_json, fsync_directorio, guardar_json_atomico,
+    leer_lineas_json, reemplazar, validar_durabilidad
+)
+from exportar import escribir_csv, escribir_parquet, iterar_json, leer_cabecera, parsear_fecha
+from importar import importar_en_streaming, iterar_usuarios
+
+
+# Esquema de columnas de cada dataset exportable
+EXPORT_DATASETS = {
+    'historial': [('usuario', 'str'), ('keyword', 'str'), ('tipo', 'str'), ('fecha', 'fecha')],
+    'repetidos': [('usuario', 'str'), ('count', 'int'), ('first_seen', 'fecha'), ('last_seen', 'fecha')],
+    'principales': [('usuario', 'str')],
+}
 
 
 class UsuariosManager:
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, backup_dir: str = None, durabilidad: str = None):
         self.data_dir = data_dir or Config.DATA_DIR
+        self.durabilidad = validar_durabilidad(durabilidad or Config.DURABILIDAD)
+        self._grupo: Optional[GrupoCommit] = None
         self.usuarios_base_path = os.path.join(self.data_dir, "usuarios_base.json")
         self.historial_path = os.path.join(self.data_dir, "historial_entregados.json")
+        self.historial_diario_path = os.path.join(self.data_dir, "historial_entregados.jsonl")
         self.repetidos_path = os.path.join(self.data_dir, "usuarios_repetidos.json")
+        self.repetidos_log_path = os.path.join(self.data_dir, "usuarios_repetidos_log.json")
         self.principales_path = os.path.join(self.data_dir, "usuarios_principales.json")
+        self.indice_path = os.path.join(self.data_dir, "indice_entregas.json")
+        self.indice_usuarios_path = os.path.join(self.data_dir, "indice_usuarios.json")
+        self.indice_usuarios_diario_path = os.path.join(self.data_dir, "indice_usuarios.jsonl")
+        self.cuarentena_dir = os.path.join(self.data_dir, "cuarentena")
         
         # Inicializar backup manager
-        self.backup_manager = BackupManager()
+        self.backup_manager = BackupManager(backup_dir)
         
         # Crear directorio si no existe
         os.makedirs(self.data_dir, exist_ok=True)
@@ -35,72 +65,181 @@ class UsuariosManager:
         archivos = {
             self.usuarios_base_path: [],
             self.historial_path: [],
-            self.repetidos_path: [],
+            self.repetidos_path: {},
             self.principales_path: []
         }
         
-        for path, default in archivos.items():
-            if not os.path.exists(path):
-                self._guardar_json(path, default)
-                bot_logger.debug(f"Archivo inicializado: {os.path.basename(path)}")
+        with self._transaccion():
+            for path, default in archivos.items():
+                if not os.path.exists(path):
+                    self._guardar_json(path, default)
+                    bot_logger.debug(f"Archivo inicializado: {os.path.basename(path)}")
     
     def _cargar_json(self, path: str) -> List:
-        """Carga un archivo JSON con manejo de errores"""
+        """
+        Carga un archivo de datos
+        
+        Los archivos marcados como limpios en su cabecera se cargan sin
+        validar registro a registro. Los antiguos o no validados se validan
+        una sola vez: los registros inválidos van a cuarentena y el archivo
+        se reescribe marcado como limpio.
+        
+        Raises:
+            DatosCorruptosError: Si el archivo no es JSON válido o su estructura no corresponde
+        """
+        ruta = self._grupo.ruta_vigente(path) if self._grupo is not None else path
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            bot_logger.debug(f"Archivo cargado: {os.path.basename(path)} ({len(data)} items)")
-            return data
+            raw = politica_io('lectura').call(self._leer_json, ruta)
         except FileNotFoundError:
             bot_logger.warning(f"Archivo no encontrado: {path}")
             return []
         except json.JSONDecodeError as e:
             bot_logger.error(f"Error decodificando JSON en {path}: {e}")
-            return []
-        except Exception as e:
-            log_exception(bot_logger, e, f"Error cargando {path}")
-            return []
+            raise DatosCorruptosError(f"Error decodificando JSON en {path}: {e}") from e
+        
+        try:
+            data, cabecera = desenvolver(raw)
+        except DatosCorruptosError as e:
+            raise DatosCorruptosError(f"{path}: {e}") from e
+        
+        if not es_limpio(cabecera):
+            data, _ = self._validar_y_reparar(path, data)
+        
+        bot_logger.debug(f"Archivo cargado: {os.path.basename(path)} ({len(data)} items)")
+        return data
     
-    def _guardar_json(self, path: str, data: List):
-        """Guarda datos en un archivo JSON con backup automático"""
-        import time
+    def _validar_y_reparar(self, path: str, data) -> tuple:
+        """
+        Valida un archivo registro a registro, pone en cuarentena los inválidos y lo marca como limpio
+        
+        Returns:
+            Tupla (datos válidos, cantidad de registros en cuarentena)
+        """
+        dataset = dataset_de(path)
+        try:
+            data, invalidos = validar(dataset, data)
+        except DatosCorruptosError as e:
+            raise DatosCorruptosError(f"{path}: {e}") from e
+        
+        if invalidos:
+            destino = self._poner_en_cuarentena(dataset, invalidos)
+            bot_logger.warning(
+                f"{len(invalidos)} registros inválidos de {os.path.basename(path)} movidos a cuarentena: {destino}"
+            )
+        
+        self._guardar_json(path, data)
+        bot_logger.info(f"Archivo validado y marcado como limpio: {os.path.basename(path)}")
+        return data, len(invalidos)
+    
+    def _poner_en_cuarentena(self, dataset: str, registros: List) -> str:
+        """Guarda registros inválidos en data/cuarentena para revisión manual"""
+        os.makedirs(self.cuarentena_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        destino = os.path.join(self.cuarentena_dir, f"{dataset}_{timestamp}.json")
+        guardar_json_atomico(destino, registros, self.durabilidad)
+        return destino
+    
+    def migrar_datos(self, forzar: bool = False) -> Dict[str, Dict]:
+        """
+        Migra todos los archivos de datos al esquema versionado actual
+        
+        Args:
+            forzar: Revalidar también los archivos ya marcados como limpios
+            
+        Returns:
+            Informe por archivo: {'estado', 'registros', 'cuarentena'}
+        """
+        informe = {}
+        
+        # El historial se valida completo: primero se incorporan sus diarios
+        self._plegar_historial(forzar=True)
+        
+        with self._transaccion():
+            for path in self.archivos_datos():
+                nombre = os.path.basename(path)
+                raw = politica_io('lectura').call(self._leer_json, path)
+                data, cabecera = desenvolver(raw)
+                # Repetidos en el formato antiguo (lista de avistamientos) se pasan a agregados
+                agregar = path == self.repetidos_path and isinstance(data, list)
+                
+                if es_limpio(cabecera) and not (forzar or agregar):
+                    informe[nombre] = {'estado': 'limpio', 'registros': len(data), 'cuarentena': 0}
+                    continue
+                
+                cuarentena = 0
+                if forzar or not es_limpio(cabecera):
+                    data, cuarentena = self._validar_y_reparar(path, data)
+                if agregar:
+                    data = self._agregar_repetidos(data)
+                
+                informe[nombre] = {
+                    'estado': 'migrado' if cabecera is None or agregar else 'revalidado',
+                    'registros': len(data),
+                    'cuarentena': cuarentena
+                }
+        
+        bot_logger.info(f"Migración de esquema completada: {informe}")
+        return informe
+    
+    def archivos_datos(self) -> List[str]:
+        """Rutas de los archivos de datos existentes"""
+        return [
+            path for path in (
+                self.usuarios_base_path, self.principales_path, self.historial_path,
+                self.repetidos_path, self.repetidos_log_path, self.indice_path,
+                self.indice_usuarios_path
+            )
+            if os.path.exists(path)
+        ]
+    
+    @staticmethod
+    def _leer_json(path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _guardar_json(self, path: str, data: List, backup: bool = True, cabecera: Dict = None):
+        """Guarda datos en un archivo JSON (con cabecera de esquema) y backup automático"""
         try:
             # Crear backup antes de modificar
-            if os.path.exists(path):
+            if backup and os.path.exists(path):
                 self.backup_manager.create_backup(path)
             
-            # Intentar escritura atómica (temp + rename)
-            temp_path = path + '.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            documento = envolver(dataset_de(path), data, extra=cabecera)
+            
+            if self._grupo is not None:
+                # Se publica al confirmar la transacción
+                self._grupo.escribir(path, documento)
+            else:
+                guardar_json_atomico(path, documento, self.durabilidad)
             
-            # Intentar reemplazar con retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    os.replace(temp_path, path)
-                    bot_logger.debug(f"Archivo guardado: {os.path.basename(path)} ({len(data)} items)")
-                    return
-                except PermissionError:
-                    if attempt < max_retries - 1:
-                        time.sleep(0.1)  # Esperar 100ms
-                    else:
-                        # Fallback: escribir directamente (menos seguro pero funciona)
-                        bot_logger.warning(f"Usando escritura directa para {os.path.basename(path)} (archivo puede estar abierto)")
-                        with open(path, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, indent=2, ensure_ascii=False)
-                        # Limpiar archivo temporal
-                        if os.path.exists(temp_path):
-                            try:
-                                os.remove(temp_path)
-                            except:
-                                pass
-                        return
+            bot_logger.debug(f"Archivo guardado: {os.path.basename(path)} ({len(data)} items)")
             
         except Exception as e:
             log_exception(bot_logger, e, f"Error guardando {path}")
             raise
     
+    @contextmanager
+    def _transaccion(self):
+        """
+        Agrupa las escrituras de una operación para publicarlas juntas al final
+        
+        Solo tiene efecto con durabilidad 'group-commit'; las transacciones
+        anidadas se integran en la exterior.
+        """
+        if self.durabilidad != 'group-commit' or self._grupo is not None:
+            yield
+            return
+        
+        self._grupo = GrupoCommit()
+        try:
+            yield
+            self._grupo.confirmar()
+        except BaseException:
+            self._grupo.descartar()
+            raise
+        finally:
+            self._grupo = None
+    
     def cargar_usuarios_base(self) -> List[str]:
         """Carga usuarios base y los migra a principales si está vacío"""
         base = self._cargar_json(self.usuarios_base_path)
@@ -114,169 +253,659 @@ class UsuariosManager:
         
         return principales
     
-    def obtener_10_usuarios(self) -> List[str]:
-        """Obtiene 10 usuarios aleatorios que no se hayan entregado en los últimos 3 días"""
-        principales = self._cargar_json(self.principales_path)
-        historial = self._cargar_json(self.historial_path)
+    def _cargar_historial(self, path: str = None) -> List[Dict]:
+        """
+        Carga un archivo de registros {usuario, fecha, ...} como lista
         
-        # Filtrar usuarios entregados en los últimos 3 días
-        fecha_limite = datetime.now() - timedelta(days=3)
-        usuarios_bloqueados = set()
+        Usa _cargar_json (json.load en C), el camino más rápido para el ciclo
+        cargar → anexar → guardar. El historial incluye los registros de sus
+        diarios aún no plegados.
+        """
+        path = path or self.historial_path
+        vigente = self._grupo.ruta_vigente(path) if self._grupo is not None else path
+        registros = self._cargar_json(path) if os.path.exists(vigente) else []
+        if path == self.historial_path:
+            registros.extend(self._registros_diario())
+        return registros
+    
+    # ==================== DIARIO DEL HISTORIAL ====================
+    
+    def _diarios_apartados(self) -> List[tuple]:
+        """Diarios apartados para plegar como (marca, ruta), del más antiguo al más reciente"""
+        prefijo = os.path.basename(self.historial_path)[:-len('.json')] + '.'
+        apartados = []
+        for entrada in os.scandir(self.data_dir):
+            nombre = entrada.name
+            if nombre.startswith(prefijo) and nombre.endswith('.jsonl'):
+                marca = nombre[len(prefijo):-len('.jsonl')]
+                if marca.isdigit():
+                    apartados.append((marca, entrada.path))
+        return sorted(apartados)
+    
+    def _rutas_diario(self) -> List[str]:
+        """Diarios del historial existentes (apartados y activo)"""
+        rutas = [ruta for _, ruta in self._diarios_apartados()]
+        if os.path.exists(self.historial_diario_path):
+            rutas.append(self.historial_diario_path)
+        return rutas
+    
+    @staticmethod
+    def _marca_plegada(cabecera: Optional[Dict]) -> str:
+        """Marca del último diario incorporado al historial JSON ('' si ninguno)"""
+        marca = (cabecera or {}).get('diario')
+        return marca if isinstance(marca, str) else ''
+    
+    def _registros_diario(self, plegado: str = None) -> List[Dict]:
+        """
+        Registros de los diarios aún no incorporados al historial JSON
         
-        for entry in historial:
-            try:
-                fecha_entrega = datetime.fromisoformat(entry['fecha'])
-                if fecha_entrega > fecha_limite:
-                    usuarios_bloqueados.add(entry['usuario'])
-            except (KeyError, ValueError) as e:
-                bot_logger.warning(f"Entrada inválida en historial: {entry}")
+        Un diario apartado cuya marca ya figura en la cabecera del historial
+        es un resto de un pliegue interrumpido: se ignora y se elimina.
+        """
+        if plegado is None:
+            vigente = self._grupo.ruta_vigente(self.historial_path) if self._grupo is not None else self.historial_path
+            plegado = self._marca_plegada(leer_cabecera(vigente)) if os.path.exists(vigente) else ''
+        registros = []
+        for marca, ruta in self._diarios_apartados():
+            if marca <= plegado:
+                # Dentro de una transacción el historial puede no estar publicado aún
+                if self._grupo is None:
+                    os.remove(ruta)
                 continue
+            registros.extend(leer_lineas_json(ruta))
+        registros.extend(leer_lineas_json(self.historial_diario_path))
+        return registros
+    
+    def _anexar_diario(self, registros: List[Dict]):
+        """Anexa registros al diario del historial (O(registros), sin reescribir el historial)"""
+        if self._grupo is not None:
+            self._grupo.anexar(self.historial_diario_path, registros)
+        else:
+            anexar_lineas_json(self.historial_diario_path, registros, self.durabilidad != 'none')
+    
+    def _guardar_historial(self, historial):
+        """
+        Guarda el historial completo y retira sus diarios
         
-        # Usuarios disponibles
-        usuarios_disponibles = [u for u in principales if u not in usuarios_bloqueados]
+        `historial` debe incluir los registros de los diarios (tal como lo
+        devuelve _cargar_historial). El diario activo se aparta con una
+        marca creciente antes de guardar, y la cabecera del historial
+        registra esa marca: si el proceso se corta antes de eliminar el
+        diario apartado, la próxima lectura sabe que ya está incorporado.
+        """
+        marca = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        if os.path.exists(self.historial_diario_path):
+            prefijo = self.historial_path[:-len('.json')]
+            politica_io('reemplazo').call(os.replace, self.historial_diario_path, f"{prefijo}.{marca}.jsonl")
         
-        bot_logger.info(
-            f"Usuarios disponibles: {len(usuarios_disponibles)}/{len(principales)} "
-            f"(bloqueados últimos 3 días: {len(usuarios_bloqueados)})"
+        apartados = [ruta for _, ruta in self._diarios_apartados()]
+        self._guardar_json(self.historial_path, historial, cabecera={'diario': marca})
+        
+        for ruta in apartados:
+            if self._grupo is not None:
+                self._grupo.eliminar(ruta)
+            else:
+                os.remove(ruta)
+    
+    def _plegar_historial(self, forzar: bool = False):
+        """
+        Incorpora los diarios al historial JSON
+        
+        Se hace cuando el diario activo supera HISTORIAL_DIARIO_KB (o con
+        `forzar`), así que el coste O(historial) de reescribir el archivo se
+        reparte entre muchos anexos.
+        """
+        try:
+            tamano = os.path.getsize(self.historial_diario_path)
+        except FileNotFoundError:
+            tamano = 0
+        
+        if not forzar and tamano < Config.HISTORIAL_DIARIO_KB * 1024:
+            return
+        if not (tamano or self._diarios_apartados()):
+            return
+        if self._grupo is not None and self.historial_diario_path in self._grupo.anexados:
+            # Los anexos de la transacción en curso deben confirmarse antes de apartar el diario
+            return
+        
+        firmas = self._firmas_fuentes()
+        with self._transaccion():
+            self._guardar_historial(self._cargar_historial())
+        # El pliegue no cambia el contenido: el índice por usuario sigue al día
+        self._anotar_indice_usuarios(firmas, {})
+        bot_logger.debug("Diario del historial plegado en historial_entregados.json")
+    
+    def _cargar_indice(self) -> IndiceEntregas:
+        """Carga el índice de entregas, reconstruyéndolo desde el historial si no existe"""
+        if os.path.exists(self.indice_path):
+            try:
+                return IndiceEntregas.from_dict(self._cargar_json(self.indice_path) or {})
+            except DatosCorruptosError as e:
+                bot_logger.warning(f"Índice de entregas corrupto, se reconstruye: {e}")
+        
+        # Migración única: el historial solo se recorre si falta el índice
+        indice = IndiceEntregas.desde_historial(self._cargar_historial())
+        self._guardar_indice(indice)
+        bot_logger.info(f"Índice de entregas reconstruido ({len(indice.usuarios)} usuarios)")
+        return indice
+    
+    def _guardar_indice(self, indice: IndiceEntregas):
+        """Guarda el índice de entregas (derivable del historial, sin backup)"""
+        self._guardar_json(self.indice_path, indice.to_dict(), backup=False)
+    
+    def _anexar_historial(self, registros: List[Dict], indice: IndiceEntregas = None):
+        """
+        Agrega registros al historial y actualiza el índice de entregas
+        
+        Los registros se anexan al diario JSON Lines; el historial JSON solo
+        se reescribe al plegar el diario (ver _plegar_historial).
+        
+        Args:
+            registros: Registros {usuario, fecha, keyword?, tipo?} a anexar
+            indice: Índice ya cargado (se carga si es None)
+        """
+        if not registros:
+            return
+        
+        indice = indice or self._cargar_indice()
+        firmas = self._firmas_fuentes()
+        
+        with self._transaccion():
+            self._anexar_diario(registros)
+            
+            for registro in registros:
+                indice.registrar(
+                    registro['usuario'],
+                    datetime.fromisoformat(registro['fecha']).timestamp(),
+                    registro.get('keyword')
+                )
+            self._guardar_indice(indice)
+        
+        self._anotar_indice_usuarios(firmas, {'entregas': registros})
+        self._plegar_historial()
+    
+    def obtener_10_usuarios(
+        self,
+        cantidad: int = 10,
+        dias_bloqueo: int = 3,
+        desempate_aleatorio: bool = True
+    ) -> List[str]:
+        """Obtiene los usuarios que llevan más tiempo sin entregarse (excluye los de los últimos 3 días)"""
+        principales = self._cargar_json(self.principales_path)
+        indice = self._cargar_indice()
+        
+        fecha_limite = (datetime.now() - timedelta(days=dias_bloqueo)).timestamp()
+        seleccionados = indice.seleccionar_menos_recientes(
+            principales,
+            cantidad,
+            bloqueo_hasta=fecha_limite,
+            desempate_aleatorio=desempate_aleatorio
         )
         
-        # Si no hay suficientes, retornar los que haya
-        import random
-        cantidad = min(10, len(usuarios_disponibles))
-        seleccionados = random.sample(usuarios_disponibles, cantidad) if cantidad > 0 else []
+        bot_logger.info(
+            f"Seleccionados {len(seleccionados)}/{cantidad} usuarios de {len(principales)} "
+            f"(bloqueados últimos {dias_bloqueo} días excluidos)"
+        )
         
         # Registrar en historial
-        for usuario in seleccionados:
-            historial.append({
-                'usuario': usuario,
-                'fecha': datetime.now().isoformat()
-            })
-        
-        self._guardar_json(self.historial_path, historial)
+        ahora = datetime.now().isoformat()
+        self._anexar_historial(
+            [{'usuario': usuario, 'fecha': ahora} for usuario in seleccionados],
+            indice
+        )
         
-        bot_logger.info(f"Seleccionados {len(seleccionados)} usuarios")
         return seleccionados
     
+    def _cargar_repetidos(self) -> RegistroRepetidos:
+        """Carga los agregados de repetidos (migrando el formato antiguo si hace falta)"""
+        data = self._cargar_json(self.repetidos_path)
+        if isinstance(data, list):
+            data = self._agregar_repetidos(data)
+        return RegistroRepetidos.from_data(data)
+    
+    def _agregar_repetidos(self, avistamientos: List[Dict]) -> Dict[str, Dict]:
+        """Convierte el formato antiguo (un registro por avistamiento) en agregados y lo guarda"""
+        agregados = RegistroRepetidos.from_data(avistamientos).to_dict()
+        self._guardar_json(self.repetidos_path, agregados)
+        bot_logger.info(
+            f"Migrados {len(avistamientos)} avistamientos de repetidos a formato agregado "
+            f"({len(agregados)} usuarios)"
+        )
+        return agregados
+    
+    def _anexar_log_repetidos(self, avistamientos: List[Dict]):
+        """Guarda avistamientos crudos en el log opcional, limitado a REPETIDOS_LOG_MAX"""
+        maximo = Config.REPETIDOS_LOG_MAX
+        if maximo <= 0 or not avistamientos:
+            return
+        
+        log = self._cargar_json(self.repetidos_log_path) if os.path.exists(self.repetidos_log_path) else []
+        log.extend(avistamientos)
+        self._guardar_json(self.repetidos_log_path, log[-maximo:], backup=False)
+    
     def agregar_nuevos_usuarios(self, nuevos_usuarios: List[str]) -> List[str]:
-        """Agrega nuevos usuarios verificando duplicados"""
-        principales = set(self._cargar_json(self.principales_path))
-        repetidos = self._cargar_json(self.repetidos_path)
+        """
+        Agrega nuevos usuarios verificando duplicados
+        
+        Los duplicados se detectan con normalizar_usuario, la misma regla que
+        usa la importación masiva: '@Usuario' y 'usuario' son el mismo. Un
+        repetido se registra con el nombre tal como está en principales.
+        """
+        principales = self._cargar_json(self.principales_path)
+        canonicos = {}
+        for usuario in principales:
+            canonicos.setdefault(normalizar_usuario(usuario), usuario)
+        repetidos = self._cargar_repetidos()
+        firmas = self._firmas_fuentes()
         
         usuarios_agregados = []
-        usuarios_repetidos_count = 0
+        avistamientos = []
         
         for usuario in nuevos_usuarios:
             # Limpiar username
-            usuario_limpio = usuario.strip().replace('@', '')
+            usuario_limpio = usuario.strip().lstrip('@')
             
             if not usuario_limpio:
                 continue
             
-            if usuario_limpio not in principales:
-                principales.add(usuario_limpio)
+            clave = normalizar_usuario(usuario_limpio)
+            if clave not in canonicos:
+                canonicos[clave] = usuario_limpio
+                principales.append(usuario_limpio)
                 usuarios_agregados.append(usuario_limpio)
             else:
-                usuarios_repetidos_count += 1
-                # Registrar repetido con timestamp
-                repetidos.append({
-                    'usuario': usuario_limpio,
-                    'fecha': datetime.now().isoformat()
-                })
+                # Actualizar agregado del repetido
+                fecha = datetime.now().isoformat()
+                repetidos.registrar(canonicos[clave], fecha)
+                avistamientos.append({'usuario': canonicos[clave], 'fecha': fecha})
         
-        # Guardar cambios
-        self._guardar_json(self.principales_path, list(principales))
-        self._guardar_json(self.repetidos_path, repetidos)
+        # Guardar cambios (una sola barrera de durabilidad para los tres archivos)
+        with self._transaccion():
+            self._guardar_json(self.principales_path, principales)
+            self._guardar_json(self.repetidos_path, repetidos.to_dict())
+            self._anexar_log_repetidos(avistamientos)
+        
+        self._anotar_indice_usuarios(firmas, {
+            'principales': usuarios_agregados,
+            'repetidos': {
+                usuario: repetidos.agregados[usuario]
+                for usuario in {a['usuario'] for a in avistamientos}
+            }
+        })
         
         bot_logger.info(
             f"Procesados {len(nuevos_usuarios)} usuarios: "
-            f"{len(usuarios_agregados)} nuevos, {usuarios_repetidos_count} repetidos"
+            f"{len(usuarios_agregados)} nuevos, {len(avistamientos)} repetidos"
         )
         
         return usuarios_agregados
     
-    def limpiar_historial_antiguo(self, dias: int = None) -> int:
-        """Limpia entradas del historial más antiguas que X días"""
-        dias = dias or Config.DIAS_HISTORIAL_LIMPIEZA
-        historial = self._cargar_json(self.historial_path)
-        fecha_limite = datetime.now() - timedelta(days=dias)
+    # ==================== ÍNDICE POR USUARIO ====================
+    
+    def _firmas_fuentes(self) -> Dict[str, List[int]]:
+        """(tamaño, mtime_ns) de los archivos fuente del índice (incluye escrituras pendientes)"""
+        fuentes = {
+            'principales': self.principales_path,
+            'historial': self.historial_path,
+            'historial_diario': self.historial_diario_path,
+            'repetidos': self.repetidos_path,
+        }
+        firmas = {}
+        for nombre, path in fuentes.items():
+            vigente = self._grupo.ruta_vigente(path) if self._grupo is not None else path
+            try:
+                stat = os.stat(vigente)
+                firmas[nombre] = [stat.st_size, stat.st_mtime_ns]
+            except FileNotFoundError:
+                firmas[nombre] = [0, 0]
+        return firmas
+    
+    def _anotar_indice_usuarios(self, antes: Dict[str, List[int]], delta: Dict):
+        """
+        Anexa un delta al diario del índice por usuario
+        
+        `antes` son las firmas de las fuentes previas a la escritura; el delta
+        registra también las posteriores, de modo que la cadena de deltas
+        solo es aplicable si nadie más tocó las fuentes entretanto. Si el
+        índice aún no existe no hay nada que anotar: se construye al consultar.
+        """
+        if not os.path.exists(self.indice_usuarios_path):
+            return
+        
+        # El índice es derivable: el delta no necesita barrera de durabilidad
+        anexar_lineas_json(
+            self.indice_usuarios_diario_path,
+            [dict(delta, antes=antes, despues=self._firmas_fuentes())]
+        )
+        
+        if os.path.getsize(self.indice_usuarios_diario_path) >= Config.HISTORIAL_DIARIO_KB * 1024:
+            self._indice_usuarios_vigente()
+    
+    def _indice_usuarios_vigente(self) -> Optional[IndiceUsuarios]:
+        """
+        Resumen por usuario al día, aplicando los deltas pendientes
+        
+        Retorna None si aún no se ha construido o si la cadena de deltas no
+        lleva de las firmas del resumen a las actuales (escritura externa,
+        retención, corte a mitad de una operación); en ese caso se
+        reconstruye. Si había deltas, el resumen se compacta y el diario se
+        elimina.
+        """
+        if not os.path.exists(self.indice_usuarios_path):
+            return None
+        try:
+            indice = IndiceUsuarios.from_dict(self._cargar_json(self.indice_usuarios_path))
+            deltas = leer_lineas_json(self.indice_usuarios_diario_path)
+        except DatosCorruptosError:
+            return None
+        if indice is None:
+            return None
+        
+        firmas = indice.firmas
+        for delta in deltas:
+            if not isinstance(delta, dict) or delta.get('antes') != firmas:
+                return None
+            indice.aplicar_delta(delta)
+            firmas = delta['despues']
+        
+        if firmas != self._firmas_fuentes():
+            return None
+        if deltas:
+            self._guardar_indice_usuarios(indice, firmas)
+        return indice
+    
+    def _guardar_indice_usuarios(self, indice: IndiceUsuarios, firmas: Dict[str, List[int]]):
+        """Guarda el resumen por usuario (derivable, sin backup) y retira su diario"""
+        indice.firmas = firmas
+        self._guardar_json(self.indice_usuarios_path, indice.to_dict(), backup=False)
+        if os.path.exists(self.indice_usuarios_diario_path):
+            if self._grupo is not None:
+                self._grupo.eliminar(self.indice_usuarios_diario_path)
+            else:
+                os.remove(self.indice_usuarios_diario_path)
+    
+    def cargar_indice_usuarios(self, historial: Iterable[Dict] = None) -> IndiceUsuarios:
+        """
+        Carga el resumen por usuario, reconstruyéndolo si falta o está desfasado
+        
+        Args:
+            historial: Historial ya cargado para la reconstrucción (se carga si es None)
+        """
+        indice = self._indice_usuarios_vigente()
+        if indice is not None:
+            return indice
+        
+        # Firmas tomadas antes de leer: una escritura concurrente deja el índice desfasado
+        firmas = self._firmas_fuentes()
+        indice = IndiceUsuarios.construir(
+            self._cargar_json(self.principales_path),
+            historial if historial is not None else self._cargar_historial(),
+            self._cargar_repetidos().agregados
+        )
+        self._guardar_indice_usuarios(indice, firmas)
+        bot_logger.info(f"Índice por usuario reconstruido ({len(indice)} usuarios)")
+        return indice
+    
+    def buscar_usuarios(self, usuarios: List[str], eventos: bool = True) -> Dict[str, Optional[Dict]]:
+        """
+        Línea de tiempo de uno o varios usuarios con una sola carga del índice
+        
+        Args:
+            usuarios: Usernames (con o sin @, sin distinguir mayúsculas)
+            eventos: Incluir cada entrega (lee el historial); si es False solo
+                se consulta el resumen
+            
+        Returns:
+            {usuario: línea de tiempo o None si no aparece en ningún dataset}
+        """
+        historial = self._cargar_historial() if eventos else None
+        indice = self.cargar_indice_usuarios(historial)
+        if historial is not None:
+            indice.vincular_historial(historial, usuarios)
+        return indice.buscar(usuarios)
+    
+    def importar_usuarios(
+        self,
+        archivos: List[str],
+        formato: str = None,
+        columna: str = None,
+        tam_bloque: int = 10_000
+    ) -> Dict[str, int]:
+        """
+        Importa usuarios a principales en streaming desde archivos CSV/TXT/JSON
+        
+        Los principales existentes se copian en una sola pasada mientras se
+        construye un conjunto compacto de hashes; después se anexan los
+        usuarios nuevos por bloques. Ni los principales ni los archivos de
+        entrada se cargan completos en memoria.
         
-        historial_limpio = []
-        for entry in historial:
+        Args:
+            archivos: Rutas a importar
+            formato: 'csv', 'txt' o 'json' (por extensión si es None)
+            columna: Columna (CSV) o clave (JSON) con el username
+            tam_bloque: Usuarios por escritura
+            
+        Returns:
+            Conteos {'existentes', 'leidos', 'agregados', 'duplicados', 'invalidos', 'memoria_hashes'}
+        """
+        for archivo in archivos:
+            if not os.path.isfile(archivo):
+                raise FileNotFoundError(f"No existe el archivo a importar: {archivo}")
+        
+        path = self.principales_path
+        existe = os.path.exists(path)
+        if existe:
+            self.backup_manager.create_backup(path)
+        
+        # ~20 bytes por usuario en el JSON: evita redimensionar el conjunto de hashes
+        capacidad = os.path.getsize(path) // 20 if existe else 1024
+        
+        sincronizar = self.durabilidad != 'none'
+        temp_path = path + '.tmp'
+        
+        def escribir():
+            # Las fuentes se abren en cada intento: un reintento empieza desde cero
+            fuentes = (usuario for archivo in archivos for usuario in iterar_usuarios(archivo, formato, columna))
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                escritor = EscritorLista(f, envolver(dataset_de(path), [])[CLAVE_ESQUEMA], tam_bloque)
+                resultado = importar_en_streaming(
+                    iterar_json(path) if existe else [], fuentes, escritor, capacidad
+                )
+                if sincronizar:
+                    f.flush()
+                    os.fsync(f.fileno())
+            return resultado
+        
+        try:
+            conteo, descartados = politica_io('escritura').call(escribir)
+        except BaseException:
             try:
-                if datetime.fromisoformat(entry['fecha']) > fecha_limite:
-                    historial_limpio.append(entry)
-            except (KeyError, ValueError):
-                continue
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        
+        if descartados:
+            self._poner_en_cuarentena(dataset_de(path), descartados)
         
-        eliminados = len(historial) - len(historial_limpio)
+        reemplazar(temp_path, path)
+        if sincronizar:
+            fsync_directorio(os.path.dirname(path))
+        
+        bot_logger.info(
+            f"Importación: {conteo['agregados']} agregados, {conteo['duplicados']} duplicados, "
+            f"{conteo['invalidos']} inválidos de {conteo['leidos']} leídos "
+            f"({conteo['existentes']} ya existentes)"
+        )
+        return conteo
+    
+    def top_repetidos(self, n: int = 10) -> List[Dict]:
+        """Retorna los `n` usuarios vistos de nuevo con más frecuencia"""
+        return [
+            {'usuario': usuario, **agregado}
+            for usuario, agregado in self._cargar_repetidos().top(n)
+        ]
+    
+    def limpiar_historial_antiguo(self, dias: int = None) -> int:
+        """Limpia entradas del historial más antiguas que X días (vía el motor de retención)"""
+        from retencion import MotorRetencion, PoliticaRetencion
+        
+        dias = dias or Config.DIAS_HISTORIAL_LIMPIEZA
+        politica = PoliticaRetencion(max_dias=dias, max_elementos=Config.RETENCION_HISTORIAL_MAX)
+        eliminados = MotorRetencion(self, politicas={'historial': politica}).aplicar('historial').elementos
         
         if eliminados > 0:
-            self._guardar_json(self.historial_path, historial_limpio)
             bot_logger.info(f"Limpiados {eliminados} registros del historial (>{dias} días)")
         else:
             bot_logger.info(f"No hay registros antiguos para limpiar (>{dias} días)")
         
         return eliminados
     
+    def _contar_historial(self) -> int:
+        """
+        Número de registros del historial sin cargarlo como lista
+        
+        Con el índice por usuario al día basta con sumar sus resúmenes; si
+        no, el JSON se recorre en streaming.
+        """
+        indice = self._indice_usuarios_vigente()
+        if indice is not None:
+            return sum(entrada['entregas'] for entrada in indice.usuarios.values())
+        
+        total = sum(1 for _ in iterar_json(self.historial_path)) if os.path.exists(self.historial_path) else 0
+        return total + len(self._registros_diario())
+    
     def obtener_estadisticas(self) -> Dict:
         """Retorna estadísticas del sistema"""
+        repetidos = self._cargar_repetidos()
         stats = {
             'total_principales': len(self._cargar_json(self.principales_path)),
-            'total_historial': len(self._cargar_json(self.historial_path)),
-            'total_repetidos': len(self._cargar_json(self.repetidos_path)),
+            'total_historial': self._contar_historial(),
+            'total_repetidos': repetidos.total_avistamientos(),
+            'usuarios_repetidos': len(repetidos),
             'total_base': len(self._cargar_json(self.usuarios_base_path))
         }
         
         bot_logger.debug(f"Estadísticas: {stats}")
         return stats
     
-    def _verificar_disponibilidad_por_keyword(self, usuario: str, keyword: str, dias: int = 3) -> bool:
-        """Verifica si un usuario puede ser asignado a un keyword (no usado en últimos X días)"""
-        try:
-            historial = self._cargar_json(self.historial_path)
-            fecha_limite = datetime.now() - timedelta(days=dias)
-            
-            for registro in historial:
-                if registro.get('usuario') == usuario and registro.get('keyword') == keyword:
-                    fecha_registro = datetime.fromisoformat(registro['fecha'])
-                    if fecha_registro > fecha_limite:
-                        return False  # Usado recientemente en este keyword
-            
-            return True  # Disponible para este keyword
+    def _filas_exportacion(self, dataset: str, desde: datetime = None) -> Iterator[Dict]:
+        """Genera las filas de un dataset leyendo su JSON en streaming"""
+        if dataset == 'principales':
+            for usuario in iterar_json(self.principales_path):
+                yield {'usuario': usuario}
+            return
+        
+        if dataset == 'repetidos':
+            yield from self._filas_repetidos(desde)
+            return
+        
+        invalidos = 0
+        for entry in chain(iterar_json(self.historial_path), self._registros_diario()):
+            try:
+                fecha = parsear_fecha(entry['fecha'])
+                usuario = entry['usuario']
+            except (KeyError, ValueError, TypeError):
+                invalidos += 1
+                continue
             
-        except Exception as e:
-            bot_logger.warning(f"Error verificando disponibilidad: {e}")
-            return True  # En caso de error, permitir uso
-    
-    def _registrar_asignacion_keyword(self, usuario: str, keyword: str):
-        """Registra la asignación de un usuario a un keyword en el historial"""
-        try:
-            historial = self._cargar_json(self.historial_path)
+            if desde is not None and fecha < desde:
+                continue
             
-            # Agregar nuevo registro con keyword
-            nuevo_registro = {
+            yield {
                 'usuario': usuario,
-                'keyword': keyword,
-                'fecha': datetime.now().isoformat(),
-                'tipo': 'login_json'
+                'keyword': entry.get('keyword'),
+                'tipo': entry.get('tipo'),
+                'fecha': fecha
             }
+        
+        if invalidos:
+            bot_logger.warning(f"{invalidos} registros inválidos omitidos al exportar {dataset}")
+    
+    def _filas_repetidos(self, desde: datetime = None) -> Iterator[Dict]:
+        """Filas de los agregados de repetidos (filtra por last_seen)"""
+        for item in iterar_json(self.repetidos_path):
+            if isinstance(item, tuple):
+                usuario, agregado = item
+            else:
+                # Formato antiguo: un avistamiento por registro
+                usuario = item.get('usuario')
+                agregado = {'count': 1, 'first_seen': item.get('fecha'), 'last_seen': item.get('fecha')}
             
-            historial.append(nuevo_registro)
+            try:
+                first_seen = parsear_fecha(agregado['first_seen'])
+                last_seen = parsear_fecha(agregado['last_seen'])
+            except (KeyError, ValueError, TypeError):
+                continue
             
-            # Guardar historial actualizado
-            self._guardar_json(self.historial_path, historial)
+            if desde is not None and last_seen < desde:
+                continue
             
-            bot_logger.debug(f"Registrado: {usuario} -> {keyword}")
+            yield {
+                'usuario': usuario,
+                'count': agregado.get('count', 1),
+                'first_seen': first_seen,
+                'last_seen': last_seen
+            }
+    
+    def exportar_datos(
+        self,
+        destino_dir: str = None,
+        formato: str = 'csv',
+        desde: datetime = None,
+        datasets: List[str] = None,
+        tam_bloque: int = 10_000
+    ) -> Dict[str, str]:
+        """
+        Exporta historial, repetidos y principales a CSV o Parquet en streaming
+        
+        Args:
+            destino_dir: Carpeta de salida (Config.EXPORT_DIR por defecto)
+            formato: 'csv' o 'parquet' (requiere pyarrow)
+            desde: Solo registros con fecha >= desde (no aplica a principales)
+            datasets: Subconjunto de EXPORT_DATASETS a exportar
+            tam_bloque: Filas por bloque de escritura
             
-        except Exception as e:
-            bot_logger.warning(f"Error registrando asignación: {e}")
+        Returns:
+            Diccionario dataset -> ruta del archivo generado
+        """
+        destino_dir = destino_dir or Config.EXPORT_DIR
+        datasets = datasets or list(EXPORT_DATASETS)
+        
+        if formato not in ('csv', 'parquet'):
+            raise ValueError(f"Formato de exportación no soportado: {formato}")
+        
+        if desde is not None and desde.tzinfo is not None:
+            # Misma normalización que las fechas de los registros (hora local sin zona)
+            desde = desde.astimezone().replace(tzinfo=None)
+        
+        escribir = escribir_parquet if formato == 'parquet' else escribir_csv
+        os.makedirs(destino_dir, exist_ok=True)
+        generados = {}
+        
+        for dataset in datasets:
+            if dataset not in EXPORT_DATASETS:
+                raise ValueError(f"Dataset desconocido: {dataset}")
+            
+            path = ruta_con_marca(destino_dir, dataset, formato)
+            filas = escribir(
+                self._filas_exportacion(dataset, desde),
+                path,
+                EXPORT_DATASETS[dataset],
+                tam_bloque
+            )
+            generados[dataset] = path
+            bot_logger.info(f"Exportado {dataset}: {filas} filas -> {path}")
+        
+        return generados
     
     def modificar_login_json(
         self, 
         usuarios_fuente: List[str], 
         destino: str = None, 
         nombres: List[str] = None, 
-        total_usuarios: int = 40
+        total_usuarios: int = 40,
+        dias_bloqueo: int = 3
     ) -> Dict:
         """Modifica login.json con usuarios aleatorios distribuidos, evitando repeticiones por keyword"""
         destino = destino or Config.LOGIN_JSON_PATH
@@ -284,103 +913,59 @@ class UsuariosManager:
         if nombres is None:
             nombres = ["aurora", "emily", "eva", "gaby"]
         
-        import random
-        
         try:
-            # Limpiar usuarios
-            usuarios_fuente = list({u.strip().replace('@', '') for u in usuarios_fuente if u and u.strip()})
+            if not nombres or len(set(nombres)) != len(nombres):
+                raise ValueError("Se requiere al menos un nombre de grupo y sin repetidos")
+            
+            # Limpiar usuarios (una entrada por username normalizado, con la primera grafía)
+            unicos = {}
+            for usuario in usuarios_fuente:
+                if usuario and usuario.strip():
+                    unicos.setdefault(normalizar_usuario(usuario), usuario.strip().lstrip('@'))
+            usuarios_fuente = set(unicos.values())
             
             if len(usuarios_fuente) < total_usuarios:
                 raise ValueError(f"Se requieren al menos {total_usuarios} usuarios únicos para generar login.json")
             
-            # Filtrar usuarios por disponibilidad en cada keyword
-            usuarios_por_keyword = {}
-            usuarios_no_disponibles = set()
-            
-            for nombre in nombres:
-                disponibles = [
-                    u for u in usuarios_fuente 
-                    if self._verificar_disponibilidad_por_keyword(u, nombre, dias=3)
-                ]
-                usuarios_por_keyword[nombre] = disponibles
-                
-                # Registrar cuántos no están disponibles
-                no_disponibles = set(usuarios_fuente) - set(disponibles)
-                usuarios_no_disponibles.update(no_disponibles)
+            # Usuarios bloqueados por uso reciente en cada keyword (desde el índice)
+            indice = self._cargar_indice()
+            fecha_limite = (datetime.now() - timedelta(days=dias_bloqueo)).timestamp()
+            bloqueados = {
+                nombre: indice.bloqueados(fecha_limite, nombre) & usuarios_fuente
+                for nombre in nombres
+            }
             
+            usuarios_no_disponibles = set().union(*bloqueados.values())
             if usuarios_no_disponibles:
                 bot_logger.info(f"⚠ {len(usuarios_no_disponibles)} usuarios filtrados por uso reciente en keywords")
             
-            # Calcular usuarios por grupo
-            por_grupo = total_usuarios // len(nombres)
-            estructura = {"keywords": {}}
-            usuarios_asignados = []
+            grupos = asignar_grupos(usuarios_fuente, nombres, total_usuarios, bloqueados)
             
-            # Asignar usuarios a cada keyword
-            for i, nombre in enumerate(nombres, start=1):
-                disponibles = usuarios_por_keyword[nombre]
-                
-                # Si no hay suficientes disponibles para este keyword, usar todos los disponibles
-                if len(disponibles) < por_grupo:
+            for nombre, cupo in zip(nombres, calcular_cupos(total_usuarios, len(nombres))):
+                if len(grupos[nombre]) < cupo:
                     bot_logger.warning(
-                        f"⚠ Keyword '{nombre}': solo {len(disponibles)} usuarios disponibles "
-                        f"(necesarios: {por_grupo}). Usando todos los disponibles."
+                        f"⚠ Keyword '{nombre}': solo {len(grupos[nombre])} usuarios disponibles "
+                        f"(necesarios: {cupo})."
                     )
-                    grupo = disponibles
-                else:
-                    grupo = random.sample(disponibles, por_grupo)
-                
-                estructura["keywords"][str(i)] = {
-                    "name": nombre,
-                    "keywords": grupo
-                }
-                
-                usuarios_asignados.extend(grupo)
-                
-                # Registrar asignaciones en historial
-                for usuario in grupo:
-                    self._registrar_asignacion_keyword(usuario, nombre)
             
-            # Si faltan usuarios para completar total_usuarios, agregar de los disponibles
-            faltantes = total_usuarios - len(usuarios_asignados)
-            if faltantes > 0:
-                # Buscar usuarios que no se hayan asignado aún
-                usuarios_restantes = [u for u in usuarios_fuente if u not in usuarios_asignados]
-                
-                if usuarios_restantes:
-                    adicionales = random.sample(
-                        usuarios_restantes, 
-                        min(faltantes, len(usuarios_restantes))
-                    )
-                    
-                    # Distribuir adicionales aleatoriamente
-                    for usuario in adicionales:
-                        clave = str(random.randint(1, len(nombres)))
-                        nombre_keyword = estructura["keywords"][clave]["name"]
-                        estructura["keywords"][clave]["keywords"].append(usuario)
-                        self._registrar_asignacion_keyword(usuario, nombre_keyword)
-                        usuarios_asignados.append(usuario)
+            estructura = {"keywords": {
+                str(i): {"name": nombre, "keywords": grupos[nombre]}
+                for i, nombre in enumerate(nombres, start=1)
+            }}
             
             # Crear backup antes de modificar
             if os.path.exists(destino):
                 self.backup_manager.create_backup(destino)
             
-            # Escribir formato lateral
-            lines = ["{", '  "keywords": {']
-            for j, clave in enumerate(["1", "2", "3", "4"], start=1):
-                entry = estructura["keywords"][clave]
-                name_txt = json.dumps(entry["name"], ensure_ascii=False)
-                kws_inline = "[" + ",".join(json.dumps(x, ensure_ascii=False) for x in entry["keywords"]) + "]"
-                lines.append(f'    "{clave}": {{')
-                lines.append(f'      "name": {name_txt},')
-                lines.append(f'      "keywords": {kws_inline}')
-                lines.append(f'    }}{","if j < 4 else ""}')
-            lines.append("  }")
-            lines.append("}")
+            self._escribir_login_json(destino, estructura)
             
-            os.makedirs(os.path.dirname(destino), exist_ok=True)
-            with open(destino, "w", encoding="utf-8") as f:
-                f.write("\n".join(lines))
+            # Registrar todas las asignaciones en historial de una sola vez
+            ahora = datetime.now().isoformat()
+            self._anexar_historial([
+                {'usuario': usuario, 'keyword': nombre, 'fecha': ahora, 'tipo': 'login_json'}
+                for nombre, grupo in grupos.items()
+                for usuario in grupo
+            ], indice)
             
             # Resumen de asignación
             bot_logger.info(f"✓ login.json actualizado en: {destino}")
@@ -389,11 +974,29 @@ class UsuariosManager:
                 nombre = entry["name"]
                 cantidad = len(entry["keywords"])
                 bot_logger.info(f"  - {nombre}: {cantidad} usuarios")
-            bot_logger.info(f"  - Total: {len(usuarios_asignados)} usuarios asignados")
+            bot_logger.info(f"  - Total: {sum(len(g) for g in grupos.values())} usuarios asignados")
             
             return estructura
             
         except Exception as e:
             log_exception(bot_logger, e, "Error modificando login.json")
             raise
-
+    
+    def _escribir_login_json(self, destino: str, estructura: Dict):
+        """Escribe login.json en formato lateral (una línea por grupo)"""
+        grupos = list(estructura["keywords"].items())
+        
+        lines = ["{", '  "keywords": {']
+        for j, (clave, entry) in enumerate(grupos, start=1):
+            name_txt = json.dumps(entry["name"], ensure_ascii=False)
+            kws_inline = "[" + ",".join(json.dumps(x, ensure_ascii=False) for x in entry["keywords"]) + "]"
+            lines.append(f'    {json.dumps(clave)}: {{')
+            lines.append(f'      "name": {name_txt},')
+            lines.append(f'      "keywords": {kws_inline}')
+            lines.append(f'    }}{"," if j < len(grupos) else ""}')
+        lines.append("  }")
+        lines.append("}")
+        
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
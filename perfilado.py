@@ -0,0 +1,85 @@
+"""
+Perfilado opcional de acciones del bot (CPU con cProfile, memoria con tracemalloc)
+Se activa con BOT_PROFILE=cpu|mem o con `python bot.py --profile cpu|mem`
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+from logger import bot_logger
+from config import Config
+from utils import ruta_con_marca
+
+MODOS_PERFIL = ('cpu', 'mem')
+
+
+def _ruta_perfil(directorio: str, accion: str, extension: str) -> str:
+    os.makedirs(directorio, exist_ok=True)
+    return ruta_con_marca(directorio, accion, extension)
+
+
+def _reportar_cpu(profiler: cProfile.Profile, accion: str, path: str, top_n: int):
+    salida = io.StringIO()
+    pstats.Stats(profiler, stream=salida).sort_stats('cumulative').print_stats(top_n)
+    bot_logger.info(f"🔬 Perfil CPU de '{accion}' guardado en {path}")
+    bot_logger.info(f"Top {top_n} funciones por tiempo acumulado:\n{salida.getvalue()}")
+
+
+def _reportar_memoria(snapshot: tracemalloc.Snapshot, pico: int, accion: str, path: str, top_n: int):
+    lineas = [f"  {stat}" for stat in snapshot.statistics('lineno')[:top_n]]
+    bot_logger.info(f"🔬 Snapshot de memoria de '{accion}' guardado en {path} (pico: {pico / 1024 / 1024:.1f} MB)")
+    bot_logger.info(f"Top {top_n} líneas por memoria retenida al terminar:\n" + "\n".join(lineas))
+
+
+@contextmanager
+def perfilar(accion: str, modo: Optional[str] = None, directorio: str = None, top_n: int = None):
+    """
+    Perfila el bloque envuelto si hay un modo de perfilado activo
+
+    Args:
+        accion: Nombre de la acción (se usa en el nombre del archivo)
+        modo: 'cpu', 'mem' o None para usar Config.BOT_PROFILE (vacío = desactivado)
+        directorio: Carpeta de salida (Config.PROFILE_DIR por defecto)
+        top_n: Número de hotspots a registrar (Config.PROFILE_TOP_N por defecto)
+    """
+    modo = modo or Config.BOT_PROFILE
+    if not modo:
+        yield
+        return
+
+    if modo not in MODOS_PERFIL:
+        raise ValueError(f"Modo de perfilado inválido: {modo} (cpu | mem)")
+
+    directorio = directorio or Config.PROFILE_DIR
+    top_n = top_n or Config.PROFILE_TOP_N
+
+    if modo == 'cpu':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = _ruta_perfil(directorio, accion, 'prof')
+            profiler.dump_stats(path)
+            _reportar_cpu(profiler, accion, path, top_n)
+        return
+
+    iniciado_aqui = not tracemalloc.is_tracing()
+    if iniciado_aqui:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+        if iniciado_aqui:
+            tracemalloc.stop()
+        path = _ruta_perfil(directorio, accion, 'snapshot')
+        snapshot.dump(path)
+        _reportar_memoria(snapshot, pico, accion, path, top_n)
@@ -0,0 +1,291 @@
+"""
+Capa de persistencia de archivos JSON con niveles de durabilidad
+Escritura atómica (temp + rename) con fsync opcional y group commit,
+más anexos a diarios JSON Lines
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+from logger import bot_logger
+from utils import politica_io
+from esquema import CLAVE_DATOS, CLAVE_ESQUEMA
+
+# Niveles de durabilidad soportados:
+#   none         -> temp + rename, sin fsync (lo más rápido; puede perder datos ante un corte de luz)
+#   fsync        -> fsync del archivo y de su directorio en cada escritura
+#   group-commit -> las escrituras de una misma operación comparten una única barrera de fsync
+DURABILIDADES = ('none', 'fsync', 'group-commit')
+
+
+def fsync_directorio(directorio: str):
+    """Sincroniza la entrada de directorio (no soportado en Windows, se ignora)"""
+    try:
+        fd = os.open(directorio or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_archivo(path: str):
+    """
+    Fuerza a disco el contenido de un archivo ya cerrado
+
+    Se abre con permiso de escritura: en Windows os.fsync sobre un
+    descriptor de solo lectura falla con EBADF.
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EscritorLista:
+    """
+    Escribe un documento {"_schema": cabecera, "datos": [...]} elemento a elemento, por bloques
+
+    Produce el mismo texto que json.dump(documento, indent=2, ensure_ascii=False).
+    """
+
+    def __init__(self, f, cabecera: Dict, tam_bloque: int = 10_000):
+        self.f = f
+        self.tam_bloque = tam_bloque
+        self.bloque: List[str] = []
+        self.total = 0
+
+        texto = json.dumps({CLAVE_ESQUEMA: cabecera}, indent=2, ensure_ascii=False)
+        # Se reabre el objeto tras la cabecera para anexar "datos"
+        f.write(texto[:-2] + f',\n  "{CLAVE_DATOS}": [')
+
+    def _volcar(self):
+        if not self.bloque:
+            return
+        separador = ',' if self.total > len(self.bloque) else ''
+        self.f.write(separador + ','.join(self.bloque))
+        self.bloque = []
+
+    def escribir(self, valor: Any):
+        texto = json.dumps(valor, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+        self.bloque.append('\n    ' + texto)
+        self.total += 1
+        if len(self.bloque) >= self.tam_bloque:
+            self._volcar()
+
+    def cerrar(self):
+        self._volcar()
+        self.f.write('\n  ]\n}' if self.total else ']\n}')
+
+
+def anexar_lineas_json(path: str, registros: Iterable[Any], sincronizar: bool = False):
+    """
+    Anexa registros a un archivo JSON Lines (un registro por línea)
+
+    Si la escritura falla el archivo se trunca a su tamaño previo antes de
+    reintentar, y si un anexo anterior quedó cortado (sin salto de línea
+    final) se empieza en una línea nueva para no corromper el registro.
+    """
+    texto = ''.join(json.dumps(registro, ensure_ascii=False) + '\n' for registro in registros)
+    if not texto:
+        return
+    contenido = texto.encode('utf-8')
+
+    def escribir() -> bool:
+        nuevo = not os.path.exists(path)
+        with open(path, 'a+b') as f:
+            inicio = f.seek(0, os.SEEK_END)
+            try:
+                prefijo = b''
+                if inicio:
+                    f.seek(inicio - 1)
+                    if f.read(1) != b'\n':
+                        prefijo = b'\n'
+                f.write(prefijo + contenido)
+                f.flush()
+                if sincronizar:
+                    os.fsync(f.fileno())
+            except OSError:
+                f.truncate(inicio)
+                raise
+        return nuevo
+
+    if politica_io('escritura').call(escribir) and sincronizar:
+        fsync_directorio(os.path.dirname(path))
+
+
+def leer_lineas_json(path: str) -> List[Any]:
+    """
+    Registros de un archivo JSON Lines ([] si no existe)
+
+    Las líneas que no se pueden decodificar (un anexo cortado por un corte
+    de luz) se omiten con un aviso.
+    """
+    registros = []
+    cortadas = 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    registros.append(json.loads(linea))
+                except ValueError:
+                    cortadas += 1
+    except FileNotFoundError:
+        return []
+
+    if cortadas:
+        bot_logger.warning(f"{cortadas} líneas ilegibles omitidas en {os.path.basename(path)}")
+    return registros
+
+
+def escribir_temporal(path: str, data: Any, sincronizar: bool = False) -> str:
+    """
+    Serializa `data` en un archivo temporal junto a `path`
+
+    Args:
+        path: Ruta final del archivo
+        data: Datos serializables a JSON
+        sincronizar: Hacer fsync del temporal antes de cerrarlo
+
+    Returns:
+        Ruta del archivo temporal
+    """
+    temp_path = path + '.tmp'
+
+    def escribir():
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+
+    politica_io('escritura').call(escribir)
+    return temp_path
+
+
+def reemplazar(temp_path: str, path: str):
+    """
+    Publica el temporal sobre `path` con rename atómico
+
+    Si el destino sigue bloqueado al agotar la política de reintentos, el
+    temporal se elimina y se propaga el error: nunca se escribe de forma
+    no atómica sobre el archivo original.
+    """
+    try:
+        politica_io('reemplazo').call(os.replace, temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def guardar_json_atomico(path: str, data: Any, durabilidad: str = 'fsync'):
+    """
+    Guarda un JSON de forma atómica con el nivel de durabilidad indicado
+
+    Una escritura aislada en modo 'group-commit' equivale a 'fsync'.
+    """
+    sincronizar = durabilidad != 'none'
+    temp_path = escribir_temporal(path, data, sincronizar=sincronizar)
+    reemplazar(temp_path, path)
+    if sincronizar:
+        fsync_directorio(os.path.dirname(path))
+
+
+class GrupoCommit:
+    """
+    Agrupa varias escrituras de una operación bajo una única barrera de durabilidad
+
+    Cada temporal (y cada anexo a un diario JSON Lines, que se hace en su
+    sitio) se sincroniza con su propio descriptor de escritura antes de
+    cerrarse; al confirmar solo quedan los renames y una sincronización por
+    directorio. Si la operación falla, los temporales se descartan, los
+    anexos se truncan y ningún archivo cambia.
+    """
+
+    def __init__(self):
+        self.pendientes: Dict[str, str] = {}  # destino -> temporal
+        self.anexados: Dict[str, int] = {}  # archivo anexado -> tamaño previo (-1 si no existía)
+        self.eliminar_al_confirmar: List[str] = []
+
+    def escribir(self, path: str, data: Any):
+        """Escribe `data` a un temporal sincronizado, pendiente de confirmar"""
+        self.pendientes[path] = escribir_temporal(path, data, sincronizar=True)
+
+    def anexar(self, path: str, registros: Iterable[Any]):
+        """Anexa registros JSON Lines en su sitio (se truncan si la operación se descarta)"""
+        if path not in self.anexados:
+            self.anexados[path] = os.path.getsize(path) if os.path.exists(path) else -1
+        anexar_lineas_json(path, registros, sincronizar=True)
+
+    def eliminar(self, path: str):
+        """Elimina `path` al confirmar, después de publicar las escrituras"""
+        self.eliminar_al_confirmar.append(path)
+
+    def ruta_vigente(self, path: str) -> str:
+        """Ruta con el contenido más reciente de `path` (temporal si está pendiente)"""
+        return self.pendientes.get(path, path)
+
+    def confirmar(self):
+        """Barrera: rename de los temporales ya sincronizados y fsync de directorios"""
+        if not (self.pendientes or self.anexados or self.eliminar_al_confirmar):
+            return
+
+        for path, temp_path in self.pendientes.items():
+            reemplazar(temp_path, path)
+
+        for path in self.eliminar_al_confirmar:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        directorios = {os.path.dirname(path) for path in self.pendientes}
+        directorios.update(os.path.dirname(path) for path, previo in self.anexados.items() if previo < 0)
+        directorios.update(os.path.dirname(path) for path in self.eliminar_al_confirmar)
+        for directorio in directorios:
+            fsync_directorio(directorio)
+
+        bot_logger.debug(
+            f"Group commit: {len(self.pendientes)} archivos, {len(self.anexados)} anexos, "
+            f"{len(self.eliminar_al_confirmar)} eliminados"
+        )
+        self._limpiar()
+
+    def descartar(self):
+        """Elimina los temporales sin publicar y deshace los anexos"""
+        for temp_path in self.pendientes.values():
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+        for path, previo in self.anexados.items():
+            try:
+                if previo < 0:
+                    os.remove(path)
+                else:
+                    os.truncate(path, previo)
+            except OSError:
+                pass
+        self._limpiar()
+
+    def _limpiar(self):
+        self.pendientes.clear()
+        self.anexados.clear()
+        self.eliminar_al_confirmar.clear()
+
+
+def validar_durabilidad(durabilidad: Optional[str]) -> str:
+    """Valida el nombre del nivel de durabilidad"""
+    if durabilidad not in DURABILIDADES:
+        raise ValueError(f"Durabilidad inválida: {durabilidad} (opciones: {', '.join(DURABILIDADES)})")
+    return durabilidad
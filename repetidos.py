@@ -0,0 +1,74 @@
+"""
+Registro agregado de usuarios repetidos
+Guarda un resumen por usuario (count, first_seen, last_seen) en lugar de un registro por avistamiento
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Tuple, Union
+
+
+class RegistroRepetidos:
+    """Agregados de avistamientos repetidos por usuario"""
+
+    def __init__(self, agregados: Dict[str, Dict] = None):
+        self.agregados: Dict[str, Dict] = agregados or {}
+
+    @classmethod
+    def from_data(cls, data: Union[Dict, List]) -> 'RegistroRepetidos':
+        """
+        Construye el registro desde el JSON guardado
+
+        Acepta también el formato antiguo (lista de {usuario, fecha}),
+        que se agrega al vuelo.
+
+        Args:
+            data: Diccionario de agregados o lista de avistamientos
+
+        Returns:
+            Registro con los agregados por usuario
+        """
+        if isinstance(data, dict):
+            return cls({usuario: dict(agregado) for usuario, agregado in data.items()})
+
+        registro = cls()
+        for entry in data or []:
+            try:
+                registro.registrar(entry['usuario'], entry['fecha'])
+            except (KeyError, TypeError):
+                continue
+        return registro
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Representación serializable"""
+        return self.agregados
+
+    def registrar(self, usuario: str, fecha: str):
+        """Registra un avistamiento en O(1)"""
+        agregado = self.agregados.get(usuario)
+        if agregado is None:
+            self.agregados[usuario] = {'count': 1, 'first_seen': fecha, 'last_seen': fecha}
+            return
+
+        agregado['count'] += 1
+        if fecha < agregado['first_seen']:
+            agregado['first_seen'] = fecha
+        if fecha > agregado['last_seen']:
+            agregado['last_seen'] = fecha
+
+    def total_avistamientos(self) -> int:
+        """Suma de avistamientos repetidos de todos los usuarios"""
+        return sum(agregado['count'] for agregado in self.agregados.values())
+
+    def top(self, n: int = 10) -> List[Tuple[str, Dict]]:
+        """Los `n` usuarios más vistos de nuevo, vía heap en O(U log n)"""
+        return heapq.nlargest(
+            n,
+            self.agregados.items(),
+            key=lambda item: (item[1]['count'], item[1]['last_seen'])
+        )
+
+    def __len__(self) -> int:
+        return len(self.agregados)
+
+    def __iter__(self) -> Iterable[Tuple[str, Dict]]:
+        return iter(self.agregados.items())
@@ -0,0 +1,388 @@
+"""
+Motor de retención unificado
+Aplica políticas por dataset (antigüedad, cantidad, tamaño) a los datos del bot
+y a los archivos auxiliares (backups, checkpoints, logs rotados, cuarentena, perfiles)
+"""
+
+import json
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from logger import bot_logger
+from config import Config
+from esquema import dataset_de, envolver
+from persistencia import guardar_json_atomico
+from exportar import parsear_fecha
+
+# Datasets cuyos registros viven dentro de los JSON de DATA_DIR
+DATASETS_REGISTROS = ('historial', 'repetidos', 'repetidos_log')
+
+# Datasets de archivos completos (se pueden limpiar en segundo plano sin tocar DATA_DIR)
+DATASETS_ARCHIVOS = ('backups', 'checkpoints', 'logs', 'cuarentena', 'perfiles')
+
+DATASETS_RETENCION = DATASETS_REGISTROS + DATASETS_ARCHIVOS
+
+ESTADO_NAME = 'retencion_estado.json'
+
+
+class PoliticaRetencion:
+    """Límites de un dataset; None o 0 desactiva cada límite"""
+
+    def __init__(self, max_dias: int = None, max_elementos: int = None, max_bytes: int = None):
+        self.max_dias = max_dias or None
+        self.max_elementos = max_elementos or None
+        self.max_bytes = max_bytes or None
+
+    def activa(self) -> bool:
+        return any((self.max_dias, self.max_elementos, self.max_bytes))
+
+    def limite_fecha(self, ahora: datetime) -> Optional[datetime]:
+        return ahora - timedelta(days=self.max_dias) if self.max_dias else None
+
+    def __repr__(self) -> str:
+        return (f"PoliticaRetencion(max_dias={self.max_dias}, "
+                f"max_elementos={self.max_elementos}, max_bytes={self.max_bytes})")
+
+
+def politicas_desde_config() -> Dict[str, PoliticaRetencion]:
+    """Políticas por dataset según la configuración actual"""
+    mb = 1024 * 1024
+    return {
+        'historial': PoliticaRetencion(Config.DIAS_HISTORIAL_LIMPIEZA, Config.RETENCION_HISTORIAL_MAX),
+        'repetidos': PoliticaRetencion(Config.RETENCION_REPETIDOS_DIAS, Config.RETENCION_REPETIDOS_MAX),
+        'repetidos_log': PoliticaRetencion(Config.RETENCION_REPETIDOS_DIAS, Config.REPETIDOS_LOG_MAX),
+        # La cantidad por archivo ya la limita BackupManager (MAX_BACKUPS)
+        'backups': PoliticaRetencion(Config.RETENCION_BACKUPS_DIAS, max_bytes=Config.RETENCION_BACKUPS_MB * mb),
+        'checkpoints': PoliticaRetencion(Config.RETENCION_CHECKPOINTS_DIAS),
+        'logs': PoliticaRetencion(Config.RETENCION_LOGS_DIAS),
+        'cuarentena': PoliticaRetencion(Config.RETENCION_CUARENTENA_DIAS),
+        'perfiles': PoliticaRetencion(Config.RETENCION_PERFILES_DIAS, Config.RETENCION_PERFILES_MAX),
+    }
+
+
+class ResultadoRetencion:
+    """Resultado de aplicar (o simular) la política de un dataset"""
+
+    def __init__(self, dataset: str, elementos: int = 0, bytes_liberados: int = 0,
+                 total: int = 0, omitido: bool = False):
+        self.dataset = dataset
+        self.elementos = elementos
+        self.bytes_liberados = bytes_liberados
+        self.total = total
+        self.omitido = omitido
+
+    def to_dict(self) -> Dict:
+        return {
+            'dataset': self.dataset,
+            'elementos': self.elementos,
+            'bytes': self.bytes_liberados,
+            'total': self.total,
+            'omitido': self.omitido
+        }
+
+
+def _tamano_serializado(path: str, data) -> int:
+    """Bytes que ocuparía `data` guardado con cabecera (mismo formato que persistencia)"""
+    documento = envolver(dataset_de(path), data)
+    return len(json.dumps(documento, indent=2, ensure_ascii=False).encode('utf-8'))
+
+
+def _fecha(valor) -> Optional[datetime]:
+    try:
+        return parsear_fecha(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _seleccionar_archivos(
+    archivos: List[Tuple[str, int, float]],
+    politica: PoliticaRetencion,
+    ahora: datetime
+) -> List[Tuple[str, int, float]]:
+    """
+    Archivos a eliminar según antigüedad, cantidad y tamaño total
+
+    Args:
+        archivos: Tuplas (ruta, tamaño, mtime)
+
+    Returns:
+        Archivos que exceden la política (los más antiguos primero en eliminarse)
+    """
+    recientes = sorted(archivos, key=lambda a: a[2], reverse=True)
+    eliminar = []
+
+    limite = politica.limite_fecha(ahora)
+    if limite is not None:
+        corte = limite.timestamp()
+        eliminar.extend(a for a in recientes if a[2] < corte)
+        recientes = [a for a in recientes if a[2] >= corte]
+
+    if politica.max_elementos and len(recientes) > politica.max_elementos:
+        eliminar.extend(recientes[politica.max_elementos:])
+        recientes = recientes[:politica.max_elementos]
+
+    if politica.max_bytes:
+        acumulado = 0
+        for i, archivo in enumerate(recientes):
+            acumulado += archivo[1]
+            if acumulado > politica.max_bytes:
+                eliminar.extend(recientes[i:])
+                break
+
+    return eliminar
+
+
+class MotorRetencion:
+    """Aplica las políticas de retención de forma incremental"""
+
+    def __init__(self, manager=None, politicas: Dict[str, PoliticaRetencion] = None,
+                 intervalo_horas: float = None):
+        if manager is None:
+            from manager import UsuariosManager
+            manager = UsuariosManager()
+        self.manager = manager
+        self.politicas = politicas or politicas_desde_config()
+        self.intervalo = timedelta(hours=Config.RETENCION_INTERVALO_HORAS if intervalo_horas is None
+                                   else intervalo_horas)
+        self.estado_path = os.path.join(manager.data_dir, ESTADO_NAME)
+
+    # ==================== ESTADO INCREMENTAL ====================
+
+    def _cargar_estado(self) -> Dict[str, str]:
+        try:
+            with open(self.estado_path, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+            return estado if isinstance(estado, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _pendiente(self, estado: Dict[str, str], dataset: str, ahora: datetime) -> bool:
+        ultima = _fecha(estado.get(dataset))
+        return ultima is None or ahora - ultima >= self.intervalo
+
+    # ==================== DATASETS DE REGISTROS ====================
+
+    def _retener_lista(self, path: str, dataset: str, politica: PoliticaRetencion,
+                       ahora: datetime, dry_run: bool) -> ResultadoRetencion:
+        """Historial y log de repetidos: listas de registros con 'fecha'"""
+        if not (os.path.exists(path) or path == self.manager.historial_path and self.manager._rutas_diario()):
+            return ResultadoRetencion(dataset)
+
+        registros = self.manager._cargar_historial(path)
+        limite = politica.limite_fecha(ahora)
+
+        conservados = registros
+        if limite is not None:
+            # Los registros se anexan en orden: si el primero está dentro de la ventana, no hay nada que cortar
+            primera = _fecha(registros[0].get('fecha')) if registros else None
+            if primera is None or primera <= limite:
+                conservados = [r for r in registros if (_fecha(r.get('fecha')) or limite) > limite]
+        if politica.max_elementos and len(conservados) > politica.max_elementos:
+            conservados = conservados[-politica.max_elementos:]
+
+        eliminados = len(registros) - len(conservados)
+        if not eliminados:
+            return ResultadoRetencion(dataset, total=len(registros))
+
+        tamano = os.path.getsize(path) if os.path.exists(path) else 0
+        if path == self.manager.historial_path:
+            tamano += sum(os.path.getsize(ruta) for ruta in self.manager._rutas_diario())
+        liberados = tamano - _tamano_serializado(path, conservados)
+        if not dry_run:
+            if path == self.manager.historial_path:
+                # Los registros de los diarios ya están en `conservados`
+                self.manager._guardar_historial(conservados)
+            else:
+                self.manager._guardar_json(path, conservados)
+        return ResultadoRetencion(dataset, eliminados, max(liberados, 0), len(registros))
+
+    def _retener_repetidos(self, politica: PoliticaRetencion, ahora: datetime,
+                           dry_run: bool) -> ResultadoRetencion:
+        """Agregados de repetidos: se olvidan los usuarios no vistos en la ventana"""
+        path = self.manager.repetidos_path
+        if not os.path.exists(path):
+            return ResultadoRetencion('repetidos')
+
+        agregados = self.manager._cargar_repetidos().agregados
+        limite = politica.limite_fecha(ahora)
+
+        conservados = agregados
+        if limite is not None:
+            conservados = {
+                usuario: agregado for usuario, agregado in agregados.items()
+                if (_fecha(agregado.get('last_seen')) or limite) > limite
+            }
+        if politica.max_elementos and len(conservados) > politica.max_elementos:
+            recientes = sorted(conservados.items(), key=lambda item: item[1]['last_seen'], reverse=True)
+            conservados = dict(recientes[:politica.max_elementos])
+
+        eliminados = len(agregados) - len(conservados)
+        if not eliminados:
+            return ResultadoRetencion('repetidos', total=len(agregados))
+
+        liberados = os.path.getsize(path) - _tamano_serializado(path, conservados)
+        if not dry_run:
+            self.manager._guardar_json(path, conservados)
+        return ResultadoRetencion('repetidos', eliminados, max(liberados, 0), len(agregados))
+
+    # ==================== DATASETS DE ARCHIVOS ====================
+
+    def _archivos_dataset(self, dataset: str) -> List[Tuple[str, int, float]]:
+        """Archivos candidatos de un dataset como (ruta, tamaño, mtime)"""
+        if dataset == 'backups':
+            directorio = self.manager.backup_manager.backup_dir
+            filtro = lambda nombre: nombre.endswith('.bak')
+        elif dataset == 'checkpoints':
+            directorio = os.path.join(self.manager.data_dir, 'checkpoints')
+            filtro = lambda nombre: True
+        elif dataset == 'logs':
+            # Solo los archivos rotados (bot.log.1, bot.log.2...), nunca el log activo
+            directorio = os.path.dirname(Config.LOG_FILE)
+            prefijo = os.path.basename(Config.LOG_FILE) + '.'
+            filtro = lambda nombre: nombre.startswith(prefijo)
+        elif dataset == 'cuarentena':
+            directorio = self.manager.cuarentena_dir
+            filtro = lambda nombre: nombre.endswith('.json')
+        elif dataset == 'perfiles':
+            directorio = Config.PROFILE_DIR
+            filtro = lambda nombre: nombre.endswith(('.prof', '.snapshot'))
+        else:
+            raise ValueError(f"Dataset de retención desconocido: {dataset}")
+
+        archivos = []
+        try:
+            entradas = list(os.scandir(directorio))
+        except OSError:
+            return archivos
+
+        for entrada in entradas:
+            if entrada.is_file() and filtro(entrada.name):
+                stat = entrada.stat()
+                archivos.append((entrada.path, stat.st_size, stat.st_mtime))
+        return archivos
+
+    def _retener_archivos(self, dataset: str, politica: PoliticaRetencion,
+                          ahora: datetime, dry_run: bool) -> ResultadoRetencion:
+        archivos = self._archivos_dataset(dataset)
+        eliminar = _seleccionar_archivos(archivos, politica, ahora)
+
+        liberados = 0
+        eliminados = 0
+        for path, tamano, _ in eliminar:
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    bot_logger.warning(f"No se pudo eliminar {path}: {e}")
+                    continue
+            liberados += tamano
+            eliminados += 1
+
+        return ResultadoRetencion(dataset, eliminados, liberados, len(archivos))
+
+    # ==================== EJECUCIÓN ====================
+
+    def aplicar(self, dataset: str, dry_run: bool = False, ahora: datetime = None) -> ResultadoRetencion:
+        """Aplica (o simula) la política de un único dataset"""
+        ahora = ahora or datetime.now()
+        politica = self.politicas.get(dataset)
+        if politica is None or not politica.activa():
+            return ResultadoRetencion(dataset, omitido=True)
+
+        if dataset == 'historial':
+            return self._retener_lista(self.manager.historial_path, dataset, politica, ahora, dry_run)
+        if dataset == 'repetidos_log':
+            return self._retener_lista(self.manager.repetidos_log_path, dataset, politica, ahora, dry_run)
+        if dataset == 'repetidos':
+            return self._retener_repetidos(politica, ahora, dry_run)
+        return self._retener_archivos(dataset, politica, ahora, dry_run)
+
+    def ejecutar(
+        self,
+        datasets: Iterable[str] = None,
+        dry_run: bool = False,
+        forzar: bool = False
+    ) -> List[ResultadoRetencion]:
+        """
+        Aplica las políticas a los datasets pendientes
+
+        Cada dataset se procesa como mucho una vez por RETENCION_INTERVALO_HORAS
+        (salvo `forzar` o `dry_run`), de modo que ejecutarlo en cada arranque
+        cuesta solo leer el archivo de estado.
+
+        Args:
+            datasets: Datasets a procesar (todos por defecto)
+            dry_run: Solo calcular lo que se eliminaría, sin tocar nada
+            forzar: Ignorar el intervalo entre ejecuciones
+
+        Returns:
+            Un resultado por dataset
+        """
+        datasets = list(datasets or DATASETS_RETENCION)
+        ahora = datetime.now()
+        estado = self._cargar_estado()
+        resultados = []
+
+        # Solo los datasets de registros escriben en DATA_DIR; los de archivos no abren
+        # transacción para no interferir con el manager desde un hilo en segundo plano
+        escribe_datos = not dry_run and any(d in DATASETS_REGISTROS for d in datasets)
+
+        with self.manager._transaccion() if escribe_datos else nullcontext():
+            for dataset in datasets:
+                if not (dry_run or forzar or self._pendiente(estado, dataset, ahora)):
+                    resultados.append(ResultadoRetencion(dataset, omitido=True))
+                    continue
+
+                try:
+                    resultado = self.aplicar(dataset, dry_run, ahora)
+                except Exception as e:
+                    bot_logger.error(f"Error aplicando retención a {dataset}: {e}")
+                    continue
+
+                resultados.append(resultado)
+                if not dry_run:
+                    estado[dataset] = ahora.isoformat()
+                if resultado.elementos:
+                    accion = "Se eliminarían" if dry_run else "Eliminados"
+                    bot_logger.info(
+                        f"🧹 Retención {dataset}: {accion} {resultado.elementos} elementos "
+                        f"({resultado.bytes_liberados / 1024:.1f} KB)"
+                    )
+
+        if not dry_run:
+            guardar_json_atomico(self.estado_path, estado, 'none')
+
+        return resultados
+
+    def ejecutar_en_segundo_plano(self, datasets: Iterable[str] = DATASETS_ARCHIVOS) -> threading.Thread:
+        """
+        Ejecuta la retención en un hilo daemon
+
+        Por defecto solo procesa datasets de archivos, que no compiten con las
+        escrituras de UsuariosManager sobre DATA_DIR.
+        """
+        hilo = threading.Thread(
+            target=self.ejecutar,
+            kwargs={'datasets': list(datasets)},
+            name='retencion',
+            daemon=True
+        )
+        hilo.start()
+        return hilo
+
+
+def retencion_al_inicio(manager=None) -> Optional[threading.Thread]:
+    """
+    Retención incremental en el arranque del bot
+
+    Los datasets de registros se procesan en línea (antes de cualquier otra
+    escritura) y los de archivos en segundo plano.
+    """
+    if not Config.RETENCION_AL_INICIO:
+        return None
+
+    motor = MotorRetencion(manager)
+    motor.ejecutar(DATASETS_REGISTROS)
+    return motor.ejecutar_en_segundo_plano()
@@ -0,0 +1,35 @@
+"""
+Configuración común de los tests
+Aísla datos, backups y logs en un directorio temporal antes de importar los módulos del bot
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+# Config se construye en el primer acceso: basta con fijar el entorno antes de importar logger
+_TMP = tempfile.mkdtemp(prefix='bot_tests_')
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ.update({
+    'DATA_DIR': os.path.join(_TMP, 'data'),
+    'BACKUP_DIR': os.path.join(_TMP, 'backups'),
+    'LOG_FILE': os.path.join(_TMP, 'logs', 'bot.log'),
+    'EXPORT_DIR': os.path.join(_TMP, 'exports'),
+    'DURABILIDAD': 'none',
+    'RETENCION_AL_INICIO': 'false',
+})
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """UsuariosManager sobre un directorio de datos vacío"""
+    from manager import UsuariosManager
+    return UsuariosManager(data_dir=str(tmp_path / 'data'), backup_dir=str(tmp_path / 'backups'))
@@ -0,0 +1,145 @@
+"""
+Tests del motor de asignación a N grupos y de la escritura de login.json
+"""
+
+import json
+import random
+
+import pytest
+
+from asignacion import asignar_grupos, calcular_cupos
+
+
+def _pool(cantidad: int) -> list:
+    return [f"user{i}" for i in range(cantidad)]
+
+
+def _estructura(grupos: dict) -> dict:
+    return {"keywords": {
+        str(i): {"name": nombre, "keywords": usuarios}
+        for i, (nombre, usuarios) in enumerate(grupos.items(), start=1)
+    }}
+
+
+# ==================== calcular_cupos ====================
+
+@pytest.mark.parametrize('total, grupos, esperado', [
+    (40, 4, [10, 10, 10, 10]),
+    (10, 4, [3, 3, 2, 2]),
+    (11, 3, [4, 4, 3]),
+    (7, 7, [1] * 7),
+])
+def test_calcular_cupos_reparte_el_resto_entre_los_primeros(total, grupos, esperado):
+    assert calcular_cupos(total, grupos) == esperado
+
+
+def test_calcular_cupos_con_mas_grupos_que_total():
+    assert calcular_cupos(2, 5) == [1, 1, 0, 0, 0]
+    assert calcular_cupos(0, 3) == [0, 0, 0]
+
+
+def test_calcular_cupos_sin_grupos():
+    with pytest.raises(ValueError):
+        calcular_cupos(10, 0)
+
+
+# ==================== asignar_grupos ====================
+
+@pytest.mark.parametrize('cantidad_grupos, total', [(1, 5), (3, 10), (7, 30)])
+def test_asignar_grupos_con_n_grupos(cantidad_grupos, total):
+    nombres = [f"g{i}" for i in range(cantidad_grupos)]
+    grupos = asignar_grupos(_pool(100), nombres, total, rng=random.Random(1))
+
+    assert list(grupos) == nombres
+    assert [len(grupos[n]) for n in nombres] == calcular_cupos(total, cantidad_grupos)
+
+    asignados = [u for usuarios in grupos.values() for u in usuarios]
+    assert len(asignados) == len(set(asignados)) == total
+
+
+def test_asignar_grupos_respeta_bloqueados_por_grupo():
+    nombres = ['a', 'b', 'c']
+    pool = _pool(60)
+    bloqueados = {
+        'a': set(pool[:20]),
+        'b': set(pool[20:40]),
+        'c': set(pool[40:55]),
+    }
+    grupos = asignar_grupos(pool, nombres, 15, bloqueados, rng=random.Random(2))
+
+    for nombre in nombres:
+        assert len(grupos[nombre]) == 5
+        assert not set(grupos[nombre]) & bloqueados[nombre]
+
+
+def test_asignar_grupos_completa_con_la_reserva():
+    nombres = ['a', 'b']
+    pool = _pool(6)
+    # Nadie está libre en 'a' y solo dos usuarios lo están en 'b'
+    bloqueados = {'a': set(pool), 'b': set(pool[2:])}
+    grupos = asignar_grupos(pool, nombres, 4, bloqueados, rng=random.Random(3))
+
+    asignados = [u for usuarios in grupos.values() for u in usuarios]
+    assert len(asignados) == len(set(asignados)) == 4
+    # Los libres en 'b' entran respetando el bloqueo; el resto sale de la reserva
+    assert {'user0', 'user1'} <= set(grupos['b'])
+
+
+def test_asignar_grupos_sin_candidatos_suficientes():
+    grupos = asignar_grupos(_pool(3), ['a', 'b'], 10, rng=random.Random(4))
+    assert sum(len(g) for g in grupos.values()) == 3
+
+
+def test_asignar_grupos_es_determinista_con_semilla():
+    nombres = [f"g{i}" for i in range(5)]
+    pool = _pool(500)
+    bloqueados = {n: set(random.Random(i).sample(pool, 100)) for i, n in enumerate(nombres)}
+
+    primera = asignar_grupos(pool, nombres, 50, bloqueados, rng=random.Random(42))
+    segunda = asignar_grupos(pool, nombres, 50, bloqueados, rng=random.Random(42))
+    otra = asignar_grupos(pool, nombres, 50, bloqueados, rng=random.Random(43))
+
+    assert primera == segunda
+    assert primera != otra
+
+
+# ==================== login.json ====================
+
+@pytest.mark.parametrize('cantidad_grupos', [1, 3, 7])
+def test_escribir_login_json_es_json_valido(manager, tmp_path, cantidad_grupos):
+    grupos = {f"grupo_{i}": [f"user{i}_{j}" for j in range(3)] for i in range(cantidad_grupos)}
+    grupos['grupo_0'].append('ñandú "comillas"')
+    estructura = _estructura(grupos)
+    destino = tmp_path / 'login.json'
+
+    manager._escribir_login_json(str(destino), estructura)
+
+    texto = destino.read_text(encoding='utf-8')
+    assert json.loads(texto) == estructura
+    # Formato lateral: una línea de keywords por grupo
+    assert texto.count('"keywords": [') == cantidad_grupos
+
+
+def test_modificar_login_json_con_tres_grupos(manager, tmp_path):
+    destino = tmp_path / 'login.json'
+    nombres = ['aurora', 'emily', 'eva']
+
+    estructura = manager.modificar_login_json(_pool(50), destino=str(destino), nombres=nombres, total_usuarios=10)
+
+    escrito = json.loads(destino.read_text(encoding='utf-8'))
+    assert escrito == estructura
+    assert [escrito['keywords'][str(i)]['name'] for i in (1, 2, 3)] == nombres
+    assert [len(escrito['keywords'][str(i)]['keywords']) for i in (1, 2, 3)] == [4, 3, 3]
+    assert len(manager._cargar_historial()) == 10
+
+
+def test_modificar_login_json_deduplica_variantes_de_un_username(manager, tmp_path):
+    variantes = ['Ana', '@ana', ' ANA ', 'beto', '@Beto']
+
+    with pytest.raises(ValueError, match="al menos 3 usuarios únicos"):
+        manager.modificar_login_json(variantes, destino=str(tmp_path / 'login.json'), nombres=['a'], total_usuarios=3)
+
+    estructura = manager.modificar_login_json(
+        variantes, destino=str(tmp_path / 'login.json'), nombres=['a'], total_usuarios=2
+    )
+    assert sorted(estructura['keywords']['1']['keywords']) == ['Ana', 'beto']
@@ -0,0 +1,85 @@
+"""
+Tests de los snapshots de DATA_DIR
+"""
+
+import errno
+import os
+import shutil
+
+import pytest
+
+from backup import BackupManager
+from config import Config
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    """BackupManager con MAX_SNAPSHOTS=2 y un DATA_DIR con un archivo"""
+    monkeypatch.setenv('MAX_SNAPSHOTS', '2')
+    Config.reset()
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    (data_dir / 'usuarios_principales.json').write_text('["ana"]', encoding='utf-8')
+    yield BackupManager(str(tmp_path / 'backups')), data_dir
+    monkeypatch.delenv('MAX_SNAPSHOTS')
+    Config.reset()
+
+
+def _escribir(path, texto: str):
+    # mtime explícito: dos escrituras seguidas pueden compartir mtime en algunos sistemas
+    mtime = os.stat(path).st_mtime_ns + 1_000_000_000
+    path.write_text(texto, encoding='utf-8')
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_snapshot_fallido_no_deja_temporales(snapshots, monkeypatch):
+    manager, data_dir = snapshots
+
+    def sin_espacio(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(shutil, 'copy2', sin_espacio)
+
+    assert manager.create_snapshot(str(data_dir)) is None
+    assert os.listdir(manager.snapshots_dir) == []
+
+
+def test_restaurar_conserva_la_generacion_restaurada(snapshots):
+    manager, data_dir = snapshots
+    archivo = data_dir / 'usuarios_principales.json'
+
+    restaurar = manager.create_snapshot(str(data_dir))
+    for texto in ('["beto"]', '["carla"]'):
+        _escribir(archivo, texto)
+        manager.create_snapshot(str(data_dir), limpiar=False)
+    assert restaurar not in manager.list_snapshots()[:Config.MAX_SNAPSHOTS]
+
+    assert manager.restore_snapshot(restaurar, str(data_dir))
+    assert archivo.read_text(encoding='utf-8') == '["ana"]'
+    assert restaurar in manager.list_snapshots()
+    assert not [nombre for nombre in os.listdir(data_dir) if nombre.endswith('.tmp')]
+
+
+def test_restauracion_fallida_no_modifica_los_datos(snapshots, monkeypatch):
+    manager, data_dir = snapshots
+    (data_dir / 'historial_entregados.json').write_text('[]', encoding='utf-8')
+    generacion = manager.create_snapshot(str(data_dir))
+    _escribir(data_dir / 'usuarios_principales.json', '["beto"]')
+    _escribir(data_dir / 'historial_entregados.json', '[{}]')
+
+    original = shutil.copy2
+    copias = []
+
+    def falla_la_segunda(origen, destino, **kwargs):
+        # La primera copia es la del snapshot previo a restaurar (hardlinks aparte)
+        copias.append(destino)
+        if str(destino).endswith('.tmp') and len([c for c in copias if str(c).endswith('.tmp')]) == 2:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return original(origen, destino, **kwargs)
+
+    monkeypatch.setattr(shutil, 'copy2', falla_la_segunda)
+
+    assert not manager.restore_snapshot(generacion, str(data_dir))
+    assert (data_dir / 'usuarios_principales.json').read_text(encoding='utf-8') == '["beto"]'
+    assert (data_dir / 'historial_entregados.json').read_text(encoding='utf-8') == '[{}]'
+    assert sorted(os.listdir(data_dir)) == ['historial_entregados.json', 'usuarios_principales.json']
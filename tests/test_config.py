@@ -0,0 +1,54 @@
+"""
+Tests de la recarga de .env en caliente
+"""
+
+import os
+
+import pytest
+
+from config import Config
+
+
+@pytest.fixture
+def env(tmp_path):
+    """Archivo .env temporal como fuente de Config (se restaura al terminar)"""
+    path = tmp_path / '.env'
+    path.write_text('MAX_BACKUPS=7\n', encoding='utf-8')
+    Config.reset()
+    Config._env_path = str(path)
+    yield path
+    Config.reset()
+
+
+def _escribir(path, texto: str):
+    # mtime explícito: dos escrituras seguidas pueden compartir mtime en algunos sistemas
+    mtime = os.stat(path).st_mtime_ns + 1_000_000_000
+    path.write_text(texto, encoding='utf-8')
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_recarga_cuando_cambia_el_env(env):
+    assert Config.MAX_BACKUPS == 7
+    _escribir(env, 'MAX_BACKUPS=3\n')
+
+    assert Config.reload_if_changed(force=True)
+    assert Config.MAX_BACKUPS == 3
+
+
+def test_env_invalido_conserva_la_configuracion_anterior(env, caplog):
+    assert Config.MAX_BACKUPS == 7
+    _escribir(env, 'MAX_BACKUPS=3x\n')
+
+    assert not Config.reload_if_changed(force=True)
+    assert Config.MAX_BACKUPS == 7
+    assert 'MAX_BACKUPS' in caplog.text
+
+    # No se reintenta mientras el archivo no cambie
+    caplog.clear()
+    assert not Config.reload_if_changed(force=True)
+    assert Config.MAX_BACKUPS == 7
+    assert caplog.text == ''
+
+    _escribir(env, 'MAX_BACKUPS=4\n')
+    assert Config.reload_if_changed(force=True)
+    assert Config.MAX_BACKUPS == 4
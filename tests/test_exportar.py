@@ -0,0 +1,39 @@
+"""
+Tests de los nombres de los archivos generados (exportaciones y perfiles)
+"""
+
+import os
+from datetime import datetime
+
+import utils
+from utils import ruta_con_marca
+
+
+def test_exportaciones_seguidas_no_se_sobrescriben(manager, tmp_path):
+    manager._guardar_json(manager.historial_path, [{'usuario': 'ana', 'fecha': '2026-01-01T00:00:00'}])
+    destino = str(tmp_path / 'exports')
+
+    rutas = {manager.exportar_datos(destino_dir=destino, datasets=['historial'])['historial'] for _ in range(3)}
+
+    assert len(rutas) == 3
+
+
+def test_ruta_con_marca_anade_contador_si_el_reloj_repite(tmp_path, monkeypatch):
+    class RelojFijo(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 1, 1, 12, 0, 0, 123456)
+
+    monkeypatch.setattr(utils, 'datetime', RelojFijo)
+
+    rutas = []
+    for _ in range(3):
+        ruta = ruta_con_marca(str(tmp_path), 'exportar', 'prof')
+        open(ruta, 'w').close()
+        rutas.append(ruta)
+
+    assert [os.path.basename(r) for r in rutas] == [
+        'exportar_20260101_120000_123456.prof',
+        'exportar_20260101_120000_123456_1.prof',
+        'exportar_20260101_120000_123456_2.prof',
+    ]
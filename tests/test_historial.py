@@ -0,0 +1,110 @@
+"""
+Tests de la selección por última entrega y del diario de anexos del historial
+"""
+
+import json
+import os
+import random
+
+from historial_compacto import HistorialCompacto
+from indice_entregas import IndiceEntregas
+
+
+# ==================== SELECCIÓN ====================
+
+def test_seleccion_ignora_candidatos_repetidos():
+    indice = IndiceEntregas()
+    seleccionados = indice.seleccionar_menos_recientes(['x', 'x', 'y', 'z'], 3, desempate_aleatorio=False)
+    assert seleccionados == ['x', 'y', 'z']
+
+
+def test_seleccion_prioriza_a_los_menos_recientes_y_excluye_bloqueados():
+    indice = IndiceEntregas({'a': 300.0, 'b': 100.0, 'c': 200.0, 'd': 900.0})
+    seleccionados = indice.seleccionar_menos_recientes(
+        ['a', 'b', 'c', 'd', 'e'], 3, bloqueo_hasta=500.0, rng=random.Random(0)
+    )
+    assert seleccionados == ['e', 'b', 'c']
+
+
+# ==================== DIARIO ====================
+
+def _registro(i: int) -> dict:
+    return {'usuario': f"user{i}", 'fecha': f"2026-01-01T00:00:{i % 60:02d}"}
+
+
+def test_anexar_no_reescribe_el_historial(manager):
+    manager._guardar_json(manager.historial_path, [_registro(0)])
+    antes = os.stat(manager.historial_path).st_mtime_ns
+
+    manager._anexar_historial([_registro(1), _registro(2)])
+
+    assert os.stat(manager.historial_path).st_mtime_ns == antes
+    assert os.path.exists(manager.historial_diario_path)
+    assert [r['usuario'] for r in manager._cargar_historial()] == ['user0', 'user1', 'user2']
+
+
+def test_plegar_incorpora_el_diario(manager):
+    manager._anexar_historial([_registro(i) for i in range(5)])
+    manager._plegar_historial(forzar=True)
+
+    assert not os.path.exists(manager.historial_diario_path)
+    with open(manager.historial_path, encoding='utf-8') as f:
+        assert [r['usuario'] for r in json.load(f)['datos']] == [f"user{i}" for i in range(5)]
+
+
+def test_diario_apartado_ya_plegado_no_se_duplica(manager):
+    manager._anexar_historial([_registro(i) for i in range(3)])
+    manager._plegar_historial(forzar=True)
+
+    # Simula un corte entre guardar el historial y eliminar el diario apartado
+    with open(manager.historial_path, encoding='utf-8') as f:
+        marca = json.load(f)['_schema']['diario']
+    resto = manager.historial_path[:-len('.json')] + f".{marca}.jsonl"
+    with open(resto, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(_registro(1)) + '\n')
+
+    assert len(manager._cargar_historial()) == 3
+    assert not os.path.exists(resto)
+
+
+def test_transaccion_descartada_trunca_el_diario(tmp_path):
+    from manager import UsuariosManager
+    manager = UsuariosManager(str(tmp_path / 'data'), str(tmp_path / 'backups'), durabilidad='group-commit')
+    manager._anexar_historial([_registro(0)])
+
+    try:
+        with manager._transaccion():
+            manager._anexar_diario([_registro(1)])
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert [r['usuario'] for r in manager._cargar_historial()] == ['user0']
+
+
+def test_linea_cortada_del_diario_se_omite(manager):
+    manager._anexar_historial([_registro(0)])
+    with open(manager.historial_diario_path, 'a', encoding='utf-8') as f:
+        f.write('{"usuario": "cort')
+    manager._anexar_historial([_registro(1)])
+
+    assert [r['usuario'] for r in manager._cargar_historial()] == ['user0', 'user1']
+
+
+def test_modelo_compacto_equivale_a_la_lista(manager):
+    manager._guardar_json(manager.historial_path, [_registro(0), {'usuario': 'x', 'fecha': '2026-01-01T00:00:00+01:00'}])
+    manager._anexar_historial([_registro(1)])
+
+    registros = manager._cargar_historial()
+    assert isinstance(registros, list)
+    assert list(HistorialCompacto.desde_registros(registros)) == registros
+
+
+def test_estadisticas_cuentan_el_historial_sin_cargarlo(manager):
+    manager._guardar_json(manager.historial_path, [_registro(0), _registro(1)])
+    manager._anexar_historial([_registro(2)])
+    assert manager.obtener_estadisticas()['total_historial'] == 3
+
+    manager.buscar_usuarios(['user0'], eventos=False)
+    manager._anexar_historial([_registro(3)])
+    assert manager.obtener_estadisticas()['total_historial'] == 4
@@ -0,0 +1,47 @@
+"""
+Tests de la importación masiva y de su coherencia con agregar_nuevos_usuarios
+"""
+
+import json
+
+import manager as modulo_manager
+
+
+def _principales(manager):
+    with open(manager.principales_path, encoding='utf-8') as f:
+        return json.load(f)['datos']
+
+
+def test_agregar_e_importar_deduplican_con_la_misma_regla(manager, tmp_path):
+    manager.agregar_nuevos_usuarios(['Ana'])
+    assert manager.agregar_nuevos_usuarios(['@ANA', ' ana ']) == []
+    assert manager._cargar_repetidos().agregados['Ana']['count'] == 2
+
+    lista = tmp_path / 'lista.txt'
+    lista.write_text('ANA\nBeto\n', encoding='utf-8')
+    conteo = manager.importar_usuarios([str(lista)])
+    assert (conteo['agregados'], conteo['duplicados']) == (1, 1)
+
+    assert manager.agregar_nuevos_usuarios(['beto', 'carla']) == ['carla']
+    assert _principales(manager) == ['Ana', 'Beto', 'carla']
+
+
+def test_importacion_reintenta_la_escritura_del_temporal(manager, tmp_path, monkeypatch):
+    lista = tmp_path / 'lista.txt'
+    lista.write_text('ana\nbeto\n', encoding='utf-8')
+
+    original = modulo_manager.importar_en_streaming
+    intentos = []
+
+    def bloqueado_una_vez(*args, **kwargs):
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise PermissionError("archivo bloqueado")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(modulo_manager, 'importar_en_streaming', bloqueado_una_vez)
+    conteo = manager.importar_usuarios([str(lista)])
+
+    assert len(intentos) == 2
+    assert conteo['agregados'] == 2
+    assert _principales(manager) == ['ana', 'beto']
@@ -0,0 +1,89 @@
+"""
+Tests del índice por usuario: resumen persistido, diario de deltas y línea de tiempo
+"""
+
+import json
+import os
+
+from esquema import desenvolver
+from indice_usuarios import IndiceUsuarios
+
+
+def _entregas(manager, cantidad: int, usuario: str = 'Ana'):
+    manager._anexar_historial([
+        {'usuario': usuario, 'keyword': f"k{i % 3}", 'fecha': f"2026-01-{1 + i % 28:02d}T10:00:00"}
+        for i in range(cantidad)
+    ])
+
+
+def _leer_indice(manager) -> dict:
+    with open(manager.indice_usuarios_path, encoding='utf-8') as f:
+        return desenvolver(json.load(f))[0]
+
+
+def test_escrituras_anexan_deltas_sin_reescribir_el_resumen(manager):
+    manager.agregar_nuevos_usuarios(['Ana', 'beto'])
+    manager.buscar_usuarios(['ana'])
+    antes = os.stat(manager.indice_usuarios_path).st_mtime_ns
+
+    _entregas(manager, 5)
+    manager.agregar_nuevos_usuarios(['Ana'])
+
+    assert os.stat(manager.indice_usuarios_path).st_mtime_ns == antes
+    assert os.path.exists(manager.indice_usuarios_diario_path)
+
+    linea = manager.buscar_usuarios(['@ana'])['@ana']
+    assert linea['total_entregas'] == 5
+    assert linea['repetido']['count'] == 1
+    assert not os.path.exists(manager.indice_usuarios_diario_path)
+
+
+def test_resumen_no_crece_con_el_historial(manager):
+    manager.agregar_nuevos_usuarios(['Ana'])
+    _entregas(manager, 10)
+    manager.buscar_usuarios(['ana'], eventos=False)
+    tamano = os.path.getsize(manager.indice_usuarios_path)
+
+    _entregas(manager, 500)
+    linea = manager.buscar_usuarios(['ana'], eventos=False)['ana']
+
+    assert linea['total_entregas'] == 510
+    assert linea['eventos'] == []
+    assert os.path.getsize(manager.indice_usuarios_path) < tamano + 16
+    assert _leer_indice(manager)['usuarios']['ana']['entregas'] == 510
+
+
+def test_escritura_externa_fuerza_la_reconstruccion(manager):
+    manager.agregar_nuevos_usuarios(['Ana'])
+    manager.buscar_usuarios(['ana'])
+
+    # Otro proceso edita principales sin pasar por el manager
+    manager._guardar_json(manager.principales_path, ['Ana', 'Carla'])
+    _entregas(manager, 1, usuario='Carla')
+
+    linea = manager.buscar_usuarios(['carla'])['carla']
+    assert linea['principal'] is True
+    assert linea['total_entregas'] == 1
+
+
+def test_linea_de_tiempo_ordena_entregas_y_filtra_por_rango(manager):
+    manager.agregar_nuevos_usuarios(['Ana'])
+    manager._anexar_historial([
+        {'usuario': 'Ana', 'keyword': 'b', 'fecha': '2026-03-01T00:00:00'},
+        {'usuario': 'Ana', 'keyword': 'a', 'fecha': '2026-01-01T00:00:00'},
+        {'usuario': 'Ana', 'keyword': 'c', 'fecha': '2026-05-01T00:00:00'},
+    ])
+    manager.buscar_usuarios(['ana'])
+
+    indice = manager.cargar_indice_usuarios()
+    indice.vincular_historial(manager._cargar_historial(), ['ana'])
+
+    eventos = indice.linea_de_tiempo('ana')['eventos']
+    assert [e['keyword'] for e in eventos] == ['a', 'b', 'c']
+
+    rango = indice.linea_de_tiempo('ANA', desde='2026-02-01', hasta='2026-04-01')['eventos']
+    assert [e['keyword'] for e in rango] == ['b']
+
+
+def test_formato_antiguo_se_descarta():
+    assert IndiceUsuarios.from_dict({'usuarios': {}, 'firmas': {}}) is None
@@ -0,0 +1,55 @@
+"""
+Tests de la capa de persistencia: group commit y fsync
+"""
+
+import errno
+import fcntl
+import json
+import os
+
+import pytest
+
+import persistencia
+from persistencia import GrupoCommit, fsync_archivo
+
+
+@pytest.fixture
+def fsync_como_windows(monkeypatch):
+    """os.fsync que, como en Windows, falla con EBADF sobre descriptores de solo lectura"""
+    original = os.fsync
+
+    def fsync(fd):
+        if fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_ACCMODE == os.O_RDONLY:
+            raise OSError(errno.EBADF, "Bad file descriptor")
+        return original(fd)
+
+    monkeypatch.setattr(persistencia.os, 'fsync', fsync)
+
+
+def test_group_commit_no_sincroniza_descriptores_de_lectura(tmp_path, fsync_como_windows):
+    destino = tmp_path / 'datos.json'
+    diario = tmp_path / 'diario.jsonl'
+
+    grupo = GrupoCommit()
+    grupo.escribir(str(destino), {'a': 1})
+    grupo.anexar(str(diario), [{'b': 2}])
+    grupo.confirmar()
+
+    assert json.loads(destino.read_text(encoding='utf-8')) == {'a': 1}
+    assert diario.read_text(encoding='utf-8') == '{"b": 2}\n'
+    assert not os.path.exists(str(destino) + '.tmp')
+
+
+def test_fsync_archivo_abre_con_escritura(tmp_path, fsync_como_windows):
+    archivo = tmp_path / 'x.json'
+    archivo.write_text('{}', encoding='utf-8')
+    fsync_archivo(str(archivo))
+
+
+def test_manager_group_commit_con_fsync_de_windows(tmp_path, fsync_como_windows):
+    from manager import UsuariosManager
+    manager = UsuariosManager(
+        data_dir=str(tmp_path / 'data'), backup_dir=str(tmp_path / 'backups'), durabilidad='group-commit'
+    )
+    assert manager.agregar_nuevos_usuarios(['ana', 'beto']) == ['ana', 'beto']
+    assert manager.obtener_10_usuarios(2, dias_bloqueo=0)
@@ -0,0 +1,62 @@
+"""
+Tests de los agregados de repetidos y de la migración del formato antiguo
+"""
+
+import json
+
+from repetidos import RegistroRepetidos
+
+AVISTAMIENTOS = [
+    {'usuario': 'ana', 'fecha': '2026-01-02T00:00:00'},
+    {'usuario': 'ana', 'fecha': '2026-01-01T00:00:00'},
+    {'usuario': 'beto', 'fecha': '2026-01-03T00:00:00'},
+]
+
+
+def _escribir_formato_antiguo(manager):
+    with open(manager.repetidos_path, 'w', encoding='utf-8') as f:
+        json.dump(AVISTAMIENTOS, f)
+
+
+def _leer(manager):
+    with open(manager.repetidos_path, encoding='utf-8') as f:
+        return json.load(f)['datos']
+
+
+def test_registrar_y_top():
+    registro = RegistroRepetidos.from_data(AVISTAMIENTOS)
+    assert registro.agregados['ana'] == {
+        'count': 2, 'first_seen': '2026-01-01T00:00:00', 'last_seen': '2026-01-02T00:00:00'
+    }
+    assert [usuario for usuario, _ in registro.top(1)] == ['ana']
+    assert registro.total_avistamientos() == 3
+
+
+def test_formato_antiguo_se_guarda_agregado_una_sola_vez(manager, caplog):
+    _escribir_formato_antiguo(manager)
+
+    assert len(manager._cargar_repetidos()) == 2
+    assert _leer(manager) == RegistroRepetidos.from_data(AVISTAMIENTOS).to_dict()
+
+    caplog.clear()
+    assert len(manager._cargar_repetidos()) == 2
+    assert 'Migrados' not in caplog.text
+
+
+def test_migrar_convierte_repetidos(manager):
+    _escribir_formato_antiguo(manager)
+
+    informe = manager.migrar_datos()
+
+    assert informe['usuarios_repetidos.json']['estado'] == 'migrado'
+    assert informe['usuarios_repetidos.json']['registros'] == 2
+    assert isinstance(_leer(manager), dict)
+    assert manager.migrar_datos()['usuarios_repetidos.json']['estado'] == 'limpio'
+
+
+def test_migrar_convierte_lista_ya_marcada_como_limpia(manager):
+    # Así quedaba tras un `migrar` anterior: lista de avistamientos con cabecera limpia
+    manager._guardar_json(manager.repetidos_path, AVISTAMIENTOS)
+
+    assert manager.migrar_datos()['usuarios_repetidos.json']['estado'] == 'migrado'
+    assert set(_leer(manager)) == {'ana', 'beto'}
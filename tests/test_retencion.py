@@ -0,0 +1,38 @@
+"""
+Tests del motor de retención
+"""
+
+from datetime import datetime, timedelta, timezone
+
+
+def _iso(dias: int, aware: bool = False) -> str:
+    fecha = datetime.now() - timedelta(days=dias)
+    if aware:
+        fecha = fecha.astimezone(timezone.utc)
+    return fecha.isoformat()
+
+
+def test_retencion_con_fechas_naive_y_con_zona(manager):
+    manager._guardar_json(manager.historial_path, [
+        {'usuario': 'viejo_utc', 'fecha': _iso(90, aware=True)},
+        {'usuario': 'viejo', 'fecha': _iso(60)},
+        {'usuario': 'nuevo_utc', 'fecha': _iso(1, aware=True)},
+        {'usuario': 'nuevo', 'fecha': _iso(1)},
+    ])
+
+    assert manager.limpiar_historial_antiguo(30) == 2
+    assert [r['usuario'] for r in manager._cargar_historial()] == ['nuevo_utc', 'nuevo']
+
+
+def test_exportar_filtra_fechas_con_zona(manager, tmp_path):
+    manager._guardar_json(manager.historial_path, [
+        {'usuario': 'viejo', 'fecha': '2026-01-01T00:00:00+00:00'},
+        {'usuario': 'nuevo', 'fecha': _iso(1)},
+    ])
+    desde = datetime.now(timezone.utc) - timedelta(days=7)
+
+    generados = manager.exportar_datos(destino_dir=str(tmp_path / 'exports'), datasets=['historial'], desde=desde)
+
+    with open(generados['historial'], encoding='utf-8') as f:
+        filas = f.read().splitlines()
+    assert len(filas) == 2 and 'nuevo' in filas[1]
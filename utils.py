@@ -2,10 +2,16 @@
 Utilidades para manejo de errores y reintentos
 """
 
+import errno
+import os
 import time
 import functools
-from typing import Callable, Any, Type, Tuple
+import random
+import threading
+from datetime import datetime
+from typing import Callable, Any, Dict, Optional, Type, Tuple
 from logger import bot_logger, log_exception
+from config import Config
 
 
 class BotException(Exception):
@@ -33,11 +39,155 @@ class ScrapingException(BotException):
     pass
 
 
+class DatosCorruptosError(BotException):
+    """Excepción cuando un archivo de datos no se puede decodificar o tiene un formato inválido"""
+    pass
+
+
+class RetryMetrics:
+    """Métricas acumuladas de reintentos por operación (thread-safe)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos: Dict[str, Dict[str, float]] = {}
+    
+    def registrar(self, operacion: str, intentos: int, segundos: float, exito: bool):
+        """Registra una llamada completa (con todos sus intentos)"""
+        with self._lock:
+            datos = self._datos.setdefault(operacion, {
+                'llamadas': 0, 'reintentos': 0, 'fallos': 0,
+                'segundos_total': 0.0, 'segundos_max': 0.0
+            })
+            datos['llamadas'] += 1
+            datos['reintentos'] += intentos - 1
+            datos['fallos'] += 0 if exito else 1
+            datos['segundos_total'] += segundos
+            datos['segundos_max'] = max(datos['segundos_max'], segundos)
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Copia de las métricas actuales"""
+        with self._lock:
+            return {operacion: dict(datos) for operacion, datos in self._datos.items()}
+    
+    def reset(self):
+        """Reinicia las métricas"""
+        with self._lock:
+            self._datos.clear()
+
+
+# Métricas globales de todas las políticas de reintento
+retry_metrics = RetryMetrics()
+
+
+class RetryPolicy:
+    """
+    Política de reintentos con backoff exponencial, jitter y plazo total
+    
+    Args:
+        max_attempts: Número máximo de intentos
+        base_delay: Delay inicial en segundos
+        backoff: Factor de multiplicación del delay
+        max_delay: Tope de cada espera individual
+        deadline: Presupuesto total en segundos (None = sin plazo)
+        jitter: Usar espera aleatoria en [0, delay] (full jitter)
+        retry_on: Excepciones reintentables
+        give_up_on: Excepciones que nunca se reintentan (tienen prioridad)
+        classifier: Función opcional exc -> bool que decide si reintentar
+        name: Nombre de la operación para logs y métricas
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        backoff: float = 2.0,
+        max_delay: float = 30.0,
+        deadline: Optional[float] = None,
+        jitter: bool = True,
+        retry_on: Tuple[Type[Exception], ...] = (Exception,),
+        give_up_on: Tuple[Type[Exception], ...] = (),
+        classifier: Optional[Callable[[Exception], bool]] = None,
+        name: Optional[str] = None,
+        metrics: RetryMetrics = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.give_up_on = give_up_on
+        self.classifier = classifier
+        self.name = name
+        self.metrics = metrics or retry_metrics
+    
+    def es_reintentable(self, exc: Exception) -> bool:
+        """Clasifica una excepción como reintentable o definitiva"""
+        if isinstance(exc, self.give_up_on) or not isinstance(exc, self.retry_on):
+            return False
+        return self.classifier(exc) if self.classifier else True
+    
+    def _espera(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (self.backoff ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+    
+    def call(self, func: Callable, *args, operacion: str = None, **kwargs) -> Any:
+        """
+        Ejecuta `func` aplicando la política
+        
+        Args:
+            func: Función a ejecutar
+            operacion: Nombre para logs/métricas (por defecto el de la política o la función)
+            
+        Returns:
+            Resultado de la función
+        """
+        operacion = operacion or self.name or func.__name__
+        inicio = time.monotonic()
+        attempt = 1
+        
+        while True:
+            try:
+                resultado = func(*args, **kwargs)
+                self.metrics.registrar(operacion, attempt, time.monotonic() - inicio, True)
+                return resultado
+            except Exception as e:
+                transcurrido = time.monotonic() - inicio
+                espera = self._espera(attempt)
+                
+                agotado = attempt >= self.max_attempts
+                fuera_de_plazo = self.deadline is not None and transcurrido + espera > self.deadline
+                
+                if not self.es_reintentable(e) or agotado or fuera_de_plazo:
+                    self.metrics.registrar(operacion, attempt, transcurrido, False)
+                    if self.es_reintentable(e):
+                        motivo = "plazo agotado" if fuera_de_plazo and not agotado else f"{attempt} intentos"
+                        bot_logger.error(f"Operación {operacion} falló después de {motivo} ({transcurrido:.2f}s)")
+                    raise
+                
+                bot_logger.warning(
+                    f"Intento {attempt}/{self.max_attempts} falló para {operacion}: {str(e)}. "
+                    f"Reintentando en {espera:.2f}s..."
+                )
+                time.sleep(espera)
+                attempt += 1
+    
+    def __call__(self, func: Callable) -> Callable:
+        """Permite usar la política como decorador"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            return self.call(func, *args, operacion=self.name or func.__name__, **kwargs)
+        return wrapper
+
+
 def retry_on_exception(
     max_attempts: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: Tuple[Type[Exception], ...] = (Exception,)
+    exceptions: Tuple[Type[Exception], ...] = (Exception,),
+    max_delay: float = 30.0,
+    deadline: Optional[float] = None
 ):
     """
     Decorador para reintentar una función en caso de excepción
@@ -47,32 +197,69 @@ def retry_on_exception(
         delay: Delay inicial en segundos
         backoff: Factor de multiplicación del delay
         exceptions: Tupla de excepciones a capturar
+        max_delay: Tope de cada espera individual
+        deadline: Presupuesto total en segundos
     """
-    def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            current_delay = delay
-            
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    if attempt == max_attempts:
-                        bot_logger.error(
-                            f"Función {func.__name__} falló después de {max_attempts} intentos"
-                        )
-                        raise
-                    
-                    bot_logger.warning(
-                        f"Intento {attempt}/{max_attempts} falló para {func.__name__}: {str(e)}. "
-                        f"Reintentando en {current_delay:.1f}s..."
-                    )
-                    
-                    time.sleep(current_delay)
-                    current_delay *= backoff
-            
-        return wrapper
-    return decorator
+    return RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=delay,
+        backoff=backoff,
+        max_delay=max_delay,
+        deadline=deadline,
+        retry_on=exceptions
+    )
+
+
+# Errores de E/S que suelen ser transitorios (archivo bloqueado por antivirus/editor, etc.)
+_ERRNO_TRANSITORIOS = {errno.EACCES, errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT}
+
+
+def es_error_io_transitorio(exc: Exception) -> bool:
+    """Clasifica un OSError como transitorio (reintentable) o definitivo"""
+    if isinstance(exc, (PermissionError, BlockingIOError, InterruptedError, TimeoutError)):
+        return True
+    return isinstance(exc, OSError) and exc.errno in _ERRNO_TRANSITORIOS
+
+
+def politica_io(operacion: str) -> RetryPolicy:
+    """
+    Política de reintentos común para la E/S de la capa de datos
+    
+    Args:
+        operacion: Nombre de la operación (clave de las métricas)
+    """
+    return RetryPolicy(
+        max_attempts=Config.RETRY_IO_MAX_ATTEMPTS,
+        base_delay=Config.RETRY_IO_BASE_DELAY,
+        max_delay=Config.RETRY_IO_MAX_DELAY,
+        deadline=Config.RETRY_IO_DEADLINE,
+        retry_on=(OSError,),
+        give_up_on=(FileNotFoundError, IsADirectoryError, NotADirectoryError),
+        classifier=es_error_io_transitorio,
+        name=operacion
+    )
+
+
+def normalizar_usuario(usuario: str) -> str:
+    """Clave canónica de un username: sin espacios, sin '@' y en minúsculas"""
+    return usuario.strip().lstrip('@').lower()
+
+
+def ruta_con_marca(directorio: str, nombre: str, extension: str) -> str:
+    """
+    Ruta `<nombre>_<YYYYmmdd_HHMMSS_ffffff>.<extension>` libre en `directorio`
+
+    La marca incluye microsegundos y, si aun así el archivo ya existe (dos
+    ejecuciones en el mismo instante o un reloj de baja resolución), se
+    añade un contador para no sobrescribirlo.
+    """
+    marca = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    path = os.path.join(directorio, f"{nombre}_{marca}.{extension}")
+    contador = 1
+    while os.path.exists(path):
+        path = os.path.join(directorio, f"{nombre}_{marca}_{contador}.{extension}")
+        contador += 1
+    return path
 
 
 def safe_execute(func: Callable, *args, default=None, log_errors: bool = True, **kwargs) -> Any:
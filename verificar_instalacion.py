@@ -3,8 +3,16 @@ Script de verificación de configuración del bot
 Ejecuta este script para verificar que todo esté correctamente instalado
 """
 
-import sys
+import argparse
+import importlib.util
+import json
 import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
 
 def verificar_dependencias():
     """Verifica que todas las dependencias estén instaladas"""
@@ -24,20 +32,29 @@ def verificar_dependencias():
         'numpy': 'numpy'
     }
     
+    opcionales = {
+        'pyarrow': 'pyarrow (exportación a Parquet)'
+    }
+    
     faltantes = []
     instaladas = []
     
+    # find_spec solo localiza el módulo: no lo importa (pandas/numpy tardan segundos)
     for modulo, paquete in dependencias.items():
-        try:
-            __import__(modulo)
+        if importlib.util.find_spec(modulo) is not None:
             instaladas.append(f"✓ {paquete}")
-        except ImportError:
+        else:
             faltantes.append(f"✗ {paquete}")
     
     print("\n📦 Dependencias instaladas:")
     for dep in instaladas:
         print(f"  {dep}")
     
+    print("\n🧩 Opcionales:")
+    for modulo, descripcion in opcionales.items():
+        marca = "✓" if importlib.util.find_spec(modulo) is not None else "–"
+        print(f"  {marca} {descripcion}")
+    
     if faltantes:
         print("\n⚠ Dependencias faltantes:")
         for dep in faltantes:
@@ -62,6 +79,17 @@ def verificar_archivos():
         'utils.py',
         'backup.py',
         'checkpoint.py',
+        'persistencia.py',
+        'esquema.py',
+        'indice_entregas.py',
+        'indice_usuarios.py',
+        'asignacion.py',
+        'repetidos.py',
+        'retencion.py',
+        'exportar.py',
+        'importar.py',
+        'historial_compacto.py',
+        'perfilado.py',
         'manager.py',
         'scraper.py',
         'bot.py',
@@ -167,8 +195,146 @@ def verificar_directorios():
     return True
 
 
+# ==================== BENCHMARK DEL HOST ====================
+
+def _percentil(valores: list, percentil: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * percentil))]
+
+
+def medir_fsync(directorio: str, repeticiones: int = 30) -> dict:
+    """Latencia de escribir 4 KB + fsync del archivo + fsync del directorio"""
+    from persistencia import fsync_directorio
+    
+    os.makedirs(directorio, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix='.bench_fsync_', dir=directorio)
+    bloque = os.urandom(4096)
+    tiempos = []
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            os.write(fd, bloque)
+            os.fsync(fd)
+            fsync_directorio(directorio)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        os.close(fd)
+        os.remove(path)
+    
+    return {'mediana_ms': statistics.median(tiempos), 'p95_ms': _percentil(tiempos, 0.95)}
+
+
+def medir_json(registros: int = 100_000) -> dict:
+    """Throughput de json.dumps/json.loads sobre un historial sintético"""
+    historial = [
+        {'usuario': f"user_{i}", 'keyword': f"grupo{i % 4}", 'fecha': '2026-01-27T20:30:00.123456', 'tipo': 'login_json'}
+        for i in range(registros)
+    ]
+    
+    inicio = time.perf_counter()
+    texto = json.dumps(historial, indent=2, ensure_ascii=False)
+    segundos_dump = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    json.loads(texto)
+    segundos_load = time.perf_counter() - inicio
+    
+    megas = len(texto.encode('utf-8')) / 1024 / 1024
+    return {
+        'megas': megas,
+        'dump_mb_s': megas / segundos_dump,
+        'load_mb_s': megas / segundos_load,
+        'registros_s': registros / segundos_load
+    }
+
+
+def medir_manager(directorio: str, usuarios: int = 20_000) -> dict:
+    """Tiempos de las operaciones de UsuariosManager sobre datos sintéticos"""
+    from benchmark import cronometrar, usuarios_sinteticos
+    from manager import UsuariosManager
+    
+    tmp = tempfile.mkdtemp(prefix='bot_bench_', dir=directorio)
+    try:
+        manager = UsuariosManager(data_dir=tmp, backup_dir=os.path.join(tmp, 'backups'))
+        manager.backup_manager.enabled = False
+        pool = usuarios_sinteticos(usuarios)
+        manager._guardar_json(manager.principales_path, pool)
+        lote = pool[:5] + usuarios_sinteticos(5, seed=7)
+        destino = os.path.join(tmp, 'login.json')
+        
+        operaciones = {
+            'agregar_nuevos_usuarios (10)': lambda: manager.agregar_nuevos_usuarios(lote),
+            'obtener_10_usuarios': lambda: manager.obtener_10_usuarios(),
+            'modificar_login_json (4x10)': lambda: manager.modificar_login_json(pool, destino=destino),
+            'buscar_usuarios (10)': lambda: manager.buscar_usuarios(lote),
+        }
+        return {nombre: cronometrar(operacion, 3) * 1000 for nombre, operacion in operaciones.items()}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _valorar_fsync(mediana_ms: float) -> str:
+    if mediana_ms < 2:
+        return "rápido (SSD/NVMe): cualquier DURABILIDAD es viable"
+    if mediana_ms < 15:
+        return "aceptable: group-commit recomendado"
+    return "lento (HDD/red/antivirus): usa group-commit o none"
+
+
+def ejecutar_bench(usuarios: int) -> bool:
+    """Mide el host y muestra un informe de capacidad"""
+    import logging
+    from config import Config
+    from logger import bot_logger
+    
+    print("\n" + "=" * 60)
+    print("⏱ INFORME DE CAPACIDAD DEL HOST")
+    print("=" * 60)
+    
+    # Evitar que el logging distorsione las mediciones
+    bot_logger.setLevel(logging.WARNING)
+    
+    print(f"\n🖥 Sistema: {platform.system()} {platform.release()} | Python {platform.python_version()} | "
+          f"{os.cpu_count()} CPUs")
+    
+    try:
+        print("\n💾 Latencia de fsync (4 KB + directorio):")
+        directorios = {'DATA_DIR': Config.DATA_DIR}
+        if Config.BACKUP_ENABLED:
+            directorios['BACKUP_DIR'] = Config.BACKUP_DIR
+        for nombre, directorio in directorios.items():
+            fsync = medir_fsync(directorio)
+            libre = shutil.disk_usage(directorio).free / 1024 ** 3
+            print(f"  - {nombre} ({directorio}): mediana {fsync['mediana_ms']:.2f} ms, "
+                  f"p95 {fsync['p95_ms']:.2f} ms, {libre:.1f} GB libres")
+            print(f"    → {_valorar_fsync(fsync['mediana_ms'])}")
+        
+        resultado = medir_json()
+        print(f"\n🧾 JSON ({resultado['megas']:.1f} MB de historial sintético):")
+        print(f"  - dump: {resultado['dump_mb_s']:.1f} MB/s | load: {resultado['load_mb_s']:.1f} MB/s "
+              f"({resultado['registros_s']:,.0f} registros/s)")
+        
+        print(f"\n👥 UsuariosManager ({usuarios:,} principales, DURABILIDAD={Config.DURABILIDAD}):")
+        for operacion, ms in medir_manager(Config.DATA_DIR, usuarios).items():
+            print(f"  - {operacion}: {ms:.1f} ms")
+        
+        print("\n✅ Benchmark completado!")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Error ejecutando el benchmark: {e}")
+        return False
+
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Verificación de la instalación del bot")
+    parser.add_argument('--bench', action='store_true',
+                        help="Medir también fsync, JSON y UsuariosManager en este host")
+    parser.add_argument('--usuarios', type=int, default=20_000,
+                        help="Principales sintéticos para el benchmark de UsuariosManager")
+    args = parser.parse_args()
+    
     print("\n" + "=" * 60)
     print("🔍 VERIFICACIÓN DEL SISTEMA - TWITTER BOT")
     print("=" * 60)
@@ -190,6 +356,9 @@ def main():
     # Verificar directorios
     resultados.append(("Directorios", verificar_directorios()))
     
+    if args.bench:
+        resultados.append(("Benchmark", ejecutar_bench(args.usuarios)))
+    
     # Resumen final
     print("\n" + "=" * 60)
     print("📊 RESUMEN DE VERIFICACIÓN")